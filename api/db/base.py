@@ -8,5 +8,6 @@ from sqlalchemy.orm import DeclarativeBase
 class Base(DeclarativeBase):
     """Base class for SQLAlchemy models."""
 
-    pass
+    # Load server defaults via INSERT ... RETURNING so no refresh() is needed after commit.
+    __mapper_args__ = {"eager_defaults": True}
 
@@ -0,0 +1,31 @@
+"""Track the latest mood state on agent_state."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "20261015_0002_agent_state_last_mood"
+down_revision = "20241016_0001_initial_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("agent_state", sa.Column("last_mood_state", sa.String(length=64)))
+    op.execute(
+        """
+        UPDATE agent_state AS s
+        SET last_mood_state = latest.state
+        FROM (
+            SELECT DISTINCT ON (user_id) user_id, state
+            FROM mood_logs
+            ORDER BY user_id, ts DESC
+        ) AS latest
+        WHERE latest.user_id = s.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("agent_state", "last_mood_state")
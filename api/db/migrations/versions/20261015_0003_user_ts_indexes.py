@@ -0,0 +1,24 @@
+"""Index per-user timelines queried by timestamp."""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "20261015_0003_user_ts_indexes"
+down_revision = "20261015_0002_agent_state_last_mood"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_episodes_user_ts", "episodes", ["user_id", "ts"])
+    op.create_index("ix_memories_user_created_at", "memories", ["user_id", "created_at"])
+    op.create_index("ix_mood_logs_user_ts", "mood_logs", ["user_id", "ts"])
+    op.create_index("ix_agent_requests_user_ts", "agent_requests", ["user_id", "ts"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agent_requests_user_ts", table_name="agent_requests")
+    op.drop_index("ix_mood_logs_user_ts", table_name="mood_logs")
+    op.drop_index("ix_memories_user_created_at", table_name="memories")
+    op.drop_index("ix_episodes_user_ts", table_name="episodes")
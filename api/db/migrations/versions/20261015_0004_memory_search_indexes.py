@@ -0,0 +1,27 @@
+"""Index memory search on summaries (trigram) and keywords (array GIN)."""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "20261015_0004_memory_search_indexes"
+down_revision = "20261015_0003_user_ts_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index("ix_memories_keywords_gin", "memories", ["keywords"], postgresql_using="gin")
+    op.create_index(
+        "ix_memories_summary_trgm",
+        "memories",
+        ["summary_md"],
+        postgresql_using="gin",
+        postgresql_ops={"summary_md": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_memories_summary_trgm", table_name="memories")
+    op.drop_index("ix_memories_keywords_gin", table_name="memories")
@@ -37,6 +37,7 @@ class Episode(Base):
     """Raw conversation log entries."""
 
     __tablename__ = "episodes"
+    __table_args__ = (sa.Index("ix_episodes_user_ts", "user_id", "ts"),)
 
     id: Mapped[uuid.UUID] = uuid_pk_column()
     user_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -53,6 +54,16 @@ class Memory(Base):
     """Compressed memory entries."""
 
     __tablename__ = "memories"
+    __table_args__ = (
+        sa.Index("ix_memories_user_created_at", "user_id", "created_at"),
+        sa.Index("ix_memories_keywords_gin", "keywords", postgresql_using="gin"),
+        sa.Index(
+            "ix_memories_summary_trgm",
+            "summary_md",
+            postgresql_using="gin",
+            postgresql_ops={"summary_md": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = uuid_pk_column()
     user_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -90,6 +101,7 @@ class MoodLog(Base):
     """Mood state transitions."""
 
     __tablename__ = "mood_logs"
+    __table_args__ = (sa.Index("ix_mood_logs_user_ts", "user_id", "ts"),)
 
     id: Mapped[uuid.UUID] = uuid_pk_column()
     user_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -154,12 +166,15 @@ class AgentState(Base):
     orderliness: Mapped[float] = mapped_column(Float, nullable=False, server_default=sa.text("0.6"))
     closeness: Mapped[float] = mapped_column(Float, nullable=False, server_default=sa.text("0.5"))
     last_request_ts: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # Latest MoodLog.state, kept here so transitions need not scan mood_logs.
+    last_mood_state: Mapped[Optional[str]] = mapped_column(String(64))
 
 
 class AgentRequest(Base):
     """AI-originated requests back to the user."""
 
     __tablename__ = "agent_requests"
+    __table_args__ = (sa.Index("ix_agent_requests_user_ts", "user_id", "ts"),)
 
     id: Mapped[uuid.UUID] = uuid_pk_column()
     user_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -5,7 +5,7 @@ from __future__ import annotations
 from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from .settings import get_database_url
+from .settings import get_database_url, get_pool_options
 
 _SessionFactory: sessionmaker[Session] | None = None
 _Engine: Engine | None = None
@@ -15,7 +15,7 @@ def get_engine(echo: bool = False) -> Engine:
     """Create (or reuse) the global synchronous SQLAlchemy engine."""
     global _Engine
     if _Engine is None:
-        _Engine = create_engine(get_database_url(), echo=echo, future=True)
+        _Engine = create_engine(get_database_url(), echo=echo, future=True, **get_pool_options())
     return _Engine
 
 
@@ -23,7 +23,13 @@ def get_session_factory() -> sessionmaker[Session]:
     """Return a sessionmaker bound to the shared engine."""
     global _SessionFactory
     if _SessionFactory is None:
-        _SessionFactory = sessionmaker(bind=get_engine(), autocommit=False, autoflush=False, future=True)
+        _SessionFactory = sessionmaker(
+            bind=get_engine(),
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            future=True,
+        )
     return _SessionFactory
 
 
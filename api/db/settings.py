@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import os
-from typing import Final
+from typing import Any, Dict, Final
 
 from dotenv import load_dotenv
 
@@ -18,3 +18,15 @@ def get_database_url() -> str:
     if from_env:
         return from_env
     return _DEFAULT_DB_URL
+
+
+def get_pool_options() -> Dict[str, Any]:
+    """Return connection-pool keyword arguments for ``create_engine``."""
+    return {
+        # LIFO keeps the most recently used (warm) connections busy and lets the rest idle out.
+        "pool_use_lifo": True,
+        "pool_pre_ping": True,
+        "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "20")),
+        "pool_recycle": int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+    }
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 import unicodedata
 
@@ -66,8 +66,21 @@ EMOTION_KEYWORDS: Dict[str, Dict[str, float]] = {
     },
 }
 
+_LOWERED_KEYWORDS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    emotion: tuple((keyword, keyword.lower()) for keyword in keywords)
+    for emotion, keywords in EMOTION_KEYWORDS.items()
+}
+
 INTENSIFIERS = ("すごく", "かなり", "めっちゃ", "本当に", "とても", "超", "ほんとに")
 
+_EXPRESSIONS: Dict[str, str] = {
+    "happy": "笑顔で明るい声",
+    "sad": "悲しい表情で少し低い声",
+    "angry": "怒りをにじませた表情でやや強い声",
+    "surprised": "驚きの表情で少し高い声",
+}
+_DEFAULT_EXPRESSION = "通常の表情で落ち着いた声"
+
 
 class EmotionAnalyzer:
     """Heuristic emotion analysis with a stable local fallback."""
@@ -89,7 +102,7 @@ class EmotionAnalyzer:
         scores: Dict[str, float] = {}
         matched_keywords: Dict[str, List[str]] = {}
         for emotion, keywords in EMOTION_KEYWORDS.items():
-            matches = [keyword for keyword in keywords if keyword.lower() in normalised]
+            matches = [keyword for keyword, lowered in _LOWERED_KEYWORDS[emotion] if lowered in normalised]
             matched_keywords[emotion] = matches
             scores[emotion] = sum(keywords[keyword] for keyword in matches)
 
@@ -152,16 +165,7 @@ class EmotionAnalyzer:
             candidate = raw_primary[0]
             if isinstance(candidate, str):
                 primary = candidate.lower()
-
-        if primary == "happy":
-            return "笑顔で明るい声"
-        if primary == "sad":
-            return "悲しい表情で少し低い声"
-        if primary == "angry":
-            return "怒りをにじませた表情でやや強い声"
-        if primary == "surprised":
-            return "驚きの表情で少し高い声"
-        return "通常の表情で落ち着いた声"
+        return _EXPRESSIONS.get(primary, _DEFAULT_EXPRESSION)
 
     def get_emotion_history(self, text_history: List[str]) -> List[Dict]:
         return [self.analyze_emotion(text) for text in text_history]
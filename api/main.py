@@ -1,26 +1,31 @@
 import asyncio
+import base64
+import binascii
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import io
+import itertools
 import json
 import logging
 import os
 import queue
 import random
-import tempfile
 import threading
 import time
-import wave
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 import numpy as np
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, WebSocket
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+import httpx
 from openai import OpenAI
+import orjson
 import uvicorn
 
 logger = logging.getLogger(__name__)
@@ -32,6 +37,38 @@ SYSTEM_PROMPT = (
     "Prefer reflection and companionship over repeated questioning, and do not end with a question unless the user clearly asked for help or clarification. "
     "Keep the reply within two short sentences and 120 Japanese characters or fewer."
 )
+USER_PROMPT_PREFIX = (
+    "Generate one natural Japanese companion reply for RecoMate. "
+    "Use the conversation plan to decide tone, continuity, and whether to ask a follow-up.\n"
+)
+RESPONSE_GUIDELINES: List[str] = [
+    "1文目で感情や状況を短く受け止める。",
+    "2文目は会話プランに沿って所感・共感・小さな提案のいずれかを自然に添える。",
+    "相棒として返し、診察・面談・カウンセリングの聞き取りのように進めない。",
+    "ユーザーが明確に質問や相談をしていない限り、質問で締めない。",
+    "原因追及や過度な深掘りを避け、少し余白を残す。",
+    "話題ラベルをそのまま言わず、自然な会話として返す。",
+    "直近の会話文脈があれば、それを踏まえて自然に続ける。",
+    "関連する記憶があっても、不自然に引用せず会話に溶かす。",
+    "好みの口調は反映するが、説明的なメタ発言はしない。",
+]
+_RESPONSE_GUIDELINES_SUFFIX = (
+    ', "response_guidelines": ' + json.dumps(RESPONSE_GUIDELINES, ensure_ascii=False) + "}"
+)
+_PROMPT_CONTEXT_KEYS: Tuple[str, ...] = (
+    "display_name",
+    "mood_state",
+    "timezone",
+    "local_hour",
+    "preferences",
+    "recent_episode_context",
+    "memory_context",
+)
+FALLBACK_RESPONSES: Tuple[str, ...] = (
+    "うまく言葉をまとめきれなかったけど、ちゃんとそばにいたいと思ってる。",
+    "少し考えこんじゃったけど、急がず同じ景色を見ていたい。",
+    "いったん落ち着いて受け止めたいな。今は無理に整理しなくて大丈夫だよ。",
+)
 OPTIONAL_IMPORT_ERRORS: List[Tuple[str, Exception]] = []
 _OPTIONAL_IMPORTS_REPORTED = False
 
@@ -79,17 +116,22 @@ vtuber = None
 async def lifespan(app: FastAPI):
 
     global vtuber
+    # Google STT blocks for hundreds of ms; keep it off the shared threadpool.
+    stt_workers = max(int(os.getenv("RECOMATE_STT_WORKERS", "8")), 1)
+    app.state.stt_pool = ThreadPoolExecutor(max_workers=stt_workers, thread_name_prefix="stt")
+    app.state.stt_semaphore = asyncio.Semaphore(stt_workers)
     try:
         vtuber = VtuberAI()
 
         await asyncio.sleep(2)  # 
-        print("VTuberAI initialized successfully")
+        logger.info("VTuberAI initialized successfully")
         yield
     finally:
 
         if vtuber:
             vtuber.cleanup()
-            print("VTuberAI cleaned up")
+            logger.info("VTuberAI cleaned up")
+        app.state.stt_pool.shutdown(wait=False, cancel_futures=True)
 
 app = FastAPI(lifespan=lifespan)
 
@@ -108,8 +150,22 @@ if environment_origins:
 else:
     allowed_origins = default_origins
 
+
+class _OriginSetCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware that checks the explicit origin set before the regex."""
+
+    def __init__(self, app, **kwargs: Any) -> None:
+        super().__init__(app, **kwargs)
+        self._allow_origin_set = frozenset(self.allow_origins)
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        if origin in self._allow_origin_set:
+            return True
+        return super().is_allowed_origin(origin)
+
+
 app.add_middleware(
-    CORSMiddleware,
+    _OriginSetCORSMiddleware,
     allow_origins=allowed_origins,
     allow_origin_regex=r"http://(localhost|127\.0\.0\.1):\d+",
     allow_credentials=True,
@@ -146,22 +202,15 @@ async def chat(input_data: TextInput):
         raise HTTPException(status_code=503, detail="VTuberAI is not initialized")
     
     try:
-        vtuber.update_api_key(input_data.api_key)
-        user_emotion_data = vtuber.emotion_analyzer.analyze_emotion(input_data.text)
-        emotion = vtuber._emotion_label_from_payload(user_emotion_data)
-        runtime_context = vtuber._build_runtime_context(input_data.user_id, current_text=input_data.text)
-        response = vtuber._generate_response(input_data.text, emotion, user_emotion_data, runtime_context)
-
-        return build_chat_response_payload(
-            response=response,
-            user_emotion=vtuber.last_user_emotion,
-            assistant_emotion=vtuber.last_assistant_emotion,
-            reward=vtuber.last_reward,
-            conversation_history=vtuber.get_serialised_history(),
-            turn_metadata=vtuber.last_turn_metadata,
+        return await run_in_threadpool(
+            vtuber.run_chat_turn,
+            input_data.text,
+            input_data.user_id,
+            api_key=input_data.api_key,
+            apply_api_key=True,
         )
     except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
+        logger.exception("Error in chat endpoint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 @app.post("/api/analyze-emotion")
 async def analyze_emotion(input_data: TextInput):
@@ -172,7 +221,7 @@ async def analyze_emotion(input_data: TextInput):
         emotion = vtuber._analyze_emotion(input_data.text)
         return {"emotion": emotion}
     except Exception as e:
-        print(f"Error in analyze-emotion endpoint: {str(e)}")
+        logger.exception("Error in analyze-emotion endpoint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 @app.post("/api/text-to-speech")
 async def text_to_speech(input_data: TextInput):
@@ -182,10 +231,11 @@ async def text_to_speech(input_data: TextInput):
     if not text:
         raise HTTPException(status_code=400, detail="Text input is required for TTS")
     try:
-        vtuber.update_api_key(input_data.api_key)
-        audio_bytes = vtuber.synthesize_speech(text)
+        audio_chunks = vtuber.synthesize_speech_stream(text)
+        # Pull the first chunk eagerly so synthesis errors still map to HTTP status codes.
+        first_chunk = await run_in_threadpool(next, audio_chunks, b"")
         return StreamingResponse(
-            io.BytesIO(audio_bytes),
+            itertools.chain((first_chunk,), audio_chunks),
             media_type="audio/wav",
             headers={"Content-Disposition": "inline; filename=tts.wav"},
         )
@@ -198,13 +248,39 @@ async def text_to_speech(input_data: TextInput):
     except Exception as exc:
         logger.exception("Unexpected error during TTS generation")
         raise HTTPException(status_code=500, detail=str(exc))
+def _decode_audio_input(input_data: AudioInput) -> bytes:
+    """Return 16-bit little-endian PCM from either the base64 or legacy float payload."""
+    if input_data.audio_b64 is not None:
+        try:
+            pcm_bytes = base64.b64decode(input_data.audio_b64, validate=True)
+        except binascii.Error as exc:
+            raise ValueError("audio_b64 is not valid base64") from exc
+        if len(pcm_bytes) % 2:
+            raise ValueError("audio_b64 must contain whole int16 samples")
+        return pcm_bytes
+
+    audio_array = np.asarray(input_data.audio_data or [], dtype=np.float32)
+    if not np.isfinite(audio_array).all():
+        raise ValueError("Audio data contains invalid values")
+    # audio_array is freshly built from the list, so scale it in place.
+    np.clip(audio_array, -1.0, 1.0, out=audio_array)
+    np.multiply(audio_array, 32767, out=audio_array)
+    return audio_array.astype("<i2").tobytes()
+
+
 @app.post("/api/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(input_data: AudioInput):
     if vtuber is None:
         raise HTTPException(status_code=503, detail="VTuberAI is not initialized")
     try:
-        vtuber.update_api_key(input_data.api_key)
-        result = vtuber.transcribe_audio(input_data.audio_data, input_data.sample_rate)
+        pcm_bytes = _decode_audio_input(input_data)
+        async with app.state.stt_semaphore:
+            result = await asyncio.get_running_loop().run_in_executor(
+                app.state.stt_pool,
+                vtuber.transcribe_audio,
+                pcm_bytes,
+                input_data.sample_rate,
+            )
         return result
     except ValueError as exc:
         logger.warning("Invalid audio input: %s", exc)
@@ -215,6 +291,17 @@ async def transcribe_audio(input_data: AudioInput):
     except Exception as exc:
         logger.exception("Unexpected error during transcription")
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _dump_ws_payload(payload: Dict[str, Any]) -> str:
+    # Keep text frames for existing clients; orjson does the encoding natively.
+    return orjson.dumps(
+        payload,
+        default=str,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    ).decode("utf-8")
+
+
 @app.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
     if vtuber is None:
@@ -225,13 +312,10 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            input_data = json.loads(data)
-            if 'apiKey' in input_data or 'api_key' in input_data:
-                api_key = input_data.get('apiKey') or input_data.get('api_key')
-                vtuber.update_api_key(api_key)
+            input_data = orjson.loads(data)
+            has_api_key = 'apiKey' in input_data or 'api_key' in input_data
+            api_key = input_data.get('apiKey') or input_data.get('api_key')
             try:
-                user_emotion_data = vtuber.emotion_analyzer.analyze_emotion(input_data["text"])
-                emotion = vtuber._emotion_label_from_payload(user_emotion_data)
                 raw_user_id = input_data.get("userId") or input_data.get("user_id")
                 parsed_user_id = None
                 if isinstance(raw_user_id, str) and raw_user_id.strip():
@@ -239,26 +323,23 @@ async def websocket_endpoint(websocket: WebSocket):
                         parsed_user_id = UUID(raw_user_id)
                     except ValueError:
                         parsed_user_id = None
-                runtime_context = vtuber._build_runtime_context(parsed_user_id, current_text=input_data["text"])
-                response = vtuber._generate_response(input_data["text"], emotion, user_emotion_data, runtime_context)
-
-                await websocket.send_json(
-                    build_chat_response_payload(
-                        response=response,
-                        user_emotion=vtuber.last_user_emotion,
-                        assistant_emotion=vtuber.last_assistant_emotion,
-                        reward=vtuber.last_reward,
-                        conversation_history=vtuber.get_serialised_history(),
-                        turn_metadata=vtuber.last_turn_metadata,
-                    )
+                payload = await run_in_threadpool(
+                    vtuber.run_chat_turn,
+                    input_data["text"],
+                    parsed_user_id,
+                    api_key=api_key,
+                    apply_api_key=has_api_key,
                 )
+                await websocket.send_text(_dump_ws_payload(payload))
             except Exception as e:
-                print(f"Error in websocket chat: {str(e)}")
-                await websocket.send_json({
+                logger.exception("Error in websocket chat: %s", e)
+                await websocket.send_text(_dump_ws_payload({
                     "error": str(e)
-                })
-    except Exception as e:
-        print(f"WebSocket error: {str(e)}")
+                }))
+    except WebSocketDisconnect:
+        logger.debug("WebSocket client disconnected")
+    except Exception:
+        logger.exception("WebSocket error")
     finally:
         await websocket.close()
 class VtuberAI:
@@ -266,7 +347,14 @@ class VtuberAI:
         load_dotenv()
         self._default_api_key = os.getenv('OPENAI_API_KEY')
         self.api_key = self._default_api_key
-        self.openai_client = self._create_client(self.api_key)
+        # One keep-alive pool shared by every OpenAI client this instance creates.
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=75.0),
+        )
+        # Clients per API key so switching back to a recent key skips re-construction.
+        self._client_pool: "OrderedDict[str, OpenAI]" = OrderedDict()
+        self._client_pool_size = 8
+        self.openai_client: Optional[OpenAI] = self._create_client(self.api_key)
         self.system_prompt = os.getenv('OPENAI_SYSTEM_PROMPT', SYSTEM_PROMPT)
         primary_model = (os.getenv('OPENAI_CHAT_MODEL') or '').strip()
         fallback_model = (os.getenv('OPENAI_FALLBACK_CHAT_MODEL') or '').strip()
@@ -274,15 +362,15 @@ class VtuberAI:
         self.chat_fallback_model = fallback_model or 'gpt-4o-mini'
 
 
-        self.tts = None
-        self.model = None
+        self.tts: Optional["TextToSpeech"] = None
+        self.model: Optional["VtuberModel"] = None
         self.recognizer = sr.Recognizer() if sr else None
         self.audio_queue = queue.Queue()
         self.recognition_thread = None
         self.animation_thread = None
         self.is_listening = False
         self.is_running = False
-        self.audio_stream = None
+        self.audio_stream: Optional[Any] = None
         self.sample_rate = 16000
         if enable_tts is None:
             enable_tts = os.getenv('ENABLE_TTS', 'false').lower() in {'1', 'true', 'yes', 'on'}
@@ -291,14 +379,15 @@ class VtuberAI:
             try:
                 self.tts = TextToSpeech()
             except Exception as e:
-                print(f"Failed to initialise text-to-speech: {e}")
+                logger.warning("Failed to initialise text-to-speech: %s", e)
         
 
-        self.conversation_history = []
+        self.conversation_history: "deque[Dict[str, Any]]" = deque(maxlen=50)
         self.last_turn_metadata: Dict[str, Any] = {}
         self.last_user_emotion: Optional[Dict[str, Any]] = None
         self.last_assistant_emotion: Optional[Dict[str, Any]] = None
         self.last_reward: Optional[float] = None
+        self._turn_lock = threading.Lock()
         
 
         self.emotion_analyzer = EmotionAnalyzer(client=self.openai_client)
@@ -343,18 +432,28 @@ class VtuberAI:
                 ]
             }
         }
+        self._build_fallback_pools()
 
     def _create_client(self, api_key: Optional[str]) -> Optional[OpenAI]:
         if not api_key:
             logger.warning("OpenAI API key is not configured; LLM features will remain disabled until a key is provided.")
             return None
 
+        client = self._client_pool.get(api_key)
+        if client is not None:
+            self._client_pool.move_to_end(api_key)
+            return client
+
         try:
-            return OpenAI(api_key=api_key)
+            client = OpenAI(api_key=api_key, http_client=self._http_client)
         except Exception as exc:
             logger.error("Failed to initialise OpenAI client: %s", exc)
             OPTIONAL_IMPORT_ERRORS.append(("openai_client", exc))
             return None
+        self._client_pool[api_key] = client
+        while len(self._client_pool) > self._client_pool_size:
+            self._client_pool.popitem(last=False)
+        return client
 
     def update_api_key(self, api_key: Optional[str]):
         new_key = api_key or self._default_api_key
@@ -389,12 +488,10 @@ class VtuberAI:
         except Exception:
             entry = {'user_input': user_input, 'response': response}
         self.conversation_history.append(entry)
-        if len(self.conversation_history) > 50:
-            self.conversation_history = self.conversation_history[-50:]
 
     def get_serialised_history(self):
         history = []
-        for item in self.conversation_history[-50:]:
+        for item in self.conversation_history:
             if isinstance(item, dict):
                 if 'user_input' in item and 'response' in item:
                     history.append(build_chat_history_entry(
@@ -433,7 +530,7 @@ class VtuberAI:
         persistent_history: Optional[List[Dict[str, Any]]] = None,
     ) -> List[Dict[str, str]]:
         history_messages: List[Dict[str, str]] = []
-        recent_pairs = getattr(self.bandit, 'conversation_history', [])[-limit:]
+        recent_pairs = self.bandit.get_recent_history(limit)
         for entry in recent_pairs:
             user_text = entry.get('user_input') if isinstance(entry, dict) else None
             assistant_text = entry.get('response') if isinstance(entry, dict) else None
@@ -462,37 +559,16 @@ class VtuberAI:
         emotion_payload: Dict[str, Any],
         runtime_context: Optional[Dict[str, Any]] = None,
     ) -> str:
+        context = runtime_context or {}
         payload = {
             'user_input': user_text,
             'conversation_plan': plan.to_prompt_payload(),
             'detected_emotion': emotion_payload,
-            'runtime_context': {
-                'display_name': (runtime_context or {}).get('display_name'),
-                'mood_state': (runtime_context or {}).get('mood_state'),
-                'timezone': (runtime_context or {}).get('timezone'),
-                'local_hour': (runtime_context or {}).get('local_hour'),
-                'preferences': (runtime_context or {}).get('preferences'),
-                'recent_episode_context': (runtime_context or {}).get('recent_episode_context'),
-                'memory_context': (runtime_context or {}).get('memory_context'),
-            },
-            'response_guidelines': [
-                '1文目で感情や状況を短く受け止める。',
-                '2文目は会話プランに沿って所感・共感・小さな提案のいずれかを自然に添える。',
-                '相棒として返し、診察・面談・カウンセリングの聞き取りのように進めない。',
-                'ユーザーが明確に質問や相談をしていない限り、質問で締めない。',
-                '原因追及や過度な深掘りを避け、少し余白を残す。',
-                '話題ラベルをそのまま言わず、自然な会話として返す。',
-                '直近の会話文脈があれば、それを踏まえて自然に続ける。',
-                '関連する記憶があっても、不自然に引用せず会話に溶かす。',
-                '好みの口調は反映するが、説明的なメタ発言はしない。'
-            ]
+            'runtime_context': {key: context.get(key) for key in _PROMPT_CONTEXT_KEYS},
         }
         payload_text = json.dumps(payload, ensure_ascii=False, default=self._json_default)
-        return (
-            'Generate one natural Japanese companion reply for RecoMate. '
-            'Use the conversation plan to decide tone, continuity, and whether to ask a follow-up.\n'
-            + payload_text
-        )
+        # The guidelines never change, so splice in their pre-serialised form.
+        return ''.join((USER_PROMPT_PREFIX, payload_text[:-1], _RESPONSE_GUIDELINES_SUFFIX))
 
     def _persist_generated_turn(
         self,
@@ -548,7 +624,6 @@ class VtuberAI:
                 episode.tags = list(episode.tags or []) + ['auto_memory']
                 session.add(episode)
                 session.commit()
-                session.refresh(episode)
             self.last_turn_metadata = {
                 'episode_id': str(episode.id),
                 'memory_id': str(memory.id) if memory is not None else None,
@@ -599,23 +674,25 @@ class VtuberAI:
         )
         content = completion.choices[0].message.content or ''
         return clean_assistant_response(content)
+    def _build_fallback_pools(self) -> None:
+        """Resolve the emotion -> question -> greeting -> default cascade once."""
+        default_pool = tuple(
+            self.response_patterns.get('question')
+            or self.response_patterns.get('greeting')
+            or FALLBACK_RESPONSES
+        )
+        emotion_patterns = self.response_patterns.get('emotion')
+        self._default_fallback_pool: Tuple[str, ...] = default_pool
+        self._fallback_pools: Dict[str, Tuple[str, ...]] = {
+            emotion: tuple(patterns)
+            for emotion, patterns in (emotion_patterns.items() if isinstance(emotion_patterns, dict) else ())
+            if patterns
+        }
+
     def _fallback_response(self, user_input: str, emotion: str, emotion_data: Optional[Dict] = None, topic: Optional[str] = None) -> str:
         """Provide a graceful canned response when the LLM is unavailable."""
-        patterns: List[str] = []
-        if emotion and isinstance(self.response_patterns.get('emotion'), dict):
-            patterns = self.response_patterns['emotion'].get(emotion, [])
-        if not patterns:
-            patterns = self.response_patterns.get('question', [])
-        if not patterns:
-            patterns = self.response_patterns.get('greeting', [])
-        default_patterns = [
-            'うまく言葉をまとめきれなかったけど、ちゃんとそばにいたいと思ってる。',
-            '少し考えこんじゃったけど、急がず同じ景色を見ていたい。',
-            'いったん落ち着いて受け止めたいな。今は無理に整理しなくて大丈夫だよ。',
-        ]
-        candidate_pool = patterns or default_patterns
-        response_text = random.choice(candidate_pool) if candidate_pool else default_patterns[0]
-        return clean_assistant_response(response_text)
+        candidate_pool = self._fallback_pools.get(emotion, self._default_fallback_pool)
+        return clean_assistant_response(random.choice(candidate_pool))
 
     def _finalise_generated_response(
         self,
@@ -656,9 +733,9 @@ class VtuberAI:
                 logger.debug('Failed to record response in bandit history: %s', exc)
 
         try:
-            emotion_expression = self.emotion_analyzer.get_emotion_expression(assistant_emotion_data)
-            if hasattr(self, 'model') and getattr(self, 'model') is not None:
-                self.model.update_expression(emotion_expression)  # type: ignore[attr-defined]
+            if self.model is not None:
+                emotion_expression = self.emotion_analyzer.get_emotion_expression(assistant_emotion_data)
+                self.model.update_expression(emotion_expression)
         except Exception as exc:
             logger.debug('Failed to update model expression: %s', exc)
 
@@ -682,6 +759,36 @@ class VtuberAI:
 
 
 
+    def run_chat_turn(
+        self,
+        text: str,
+        user_id: Optional[UUID] = None,
+        *,
+        api_key: Optional[str] = None,
+        apply_api_key: bool = False,
+    ) -> Dict[str, Any]:
+        """Run one blocking chat turn (DB + LLM) and return the response payload.
+
+        Endpoints call this from the threadpool. Turns are serialised because they
+        share the ``last_*`` fields, the conversation history and the OpenAI client,
+        so the request's API key is applied inside the lock as well.
+        """
+        with self._turn_lock:
+            if apply_api_key:
+                self.update_api_key(api_key)
+            user_emotion_data = self.emotion_analyzer.analyze_emotion(text)
+            emotion = self._emotion_label_from_payload(user_emotion_data)
+            runtime_context = self._build_runtime_context(user_id, current_text=text)
+            response = self._generate_response(text, emotion, user_emotion_data, runtime_context)
+            return build_chat_response_payload(
+                response=response,
+                user_emotion=self.last_user_emotion,
+                assistant_emotion=self.last_assistant_emotion,
+                reward=self.last_reward,
+                conversation_history=self.get_serialised_history(),
+                turn_metadata=self.last_turn_metadata,
+            )
+
     def synthesize_speech(self, text: str) -> bytes:
         if not text:
             raise ValueError("Text must not be empty")
@@ -689,52 +796,40 @@ class VtuberAI:
             raise RuntimeError("Text-to-speech is not enabled")
         return self.tts.synthesise(text)
 
-    def transcribe_audio(self, audio_data: List[float], sample_rate: int) -> TranscriptionResponse:
+    def synthesize_speech_stream(self, text: str) -> Iterator[bytes]:
+        if not text:
+            raise ValueError("Text must not be empty")
+        if self.tts is None:
+            raise RuntimeError("Text-to-speech is not enabled")
+        return self.tts.synthesise_stream(text)
+
+    def transcribe_audio(self, pcm_bytes: bytes, sample_rate: int) -> TranscriptionResponse:
+        """Transcribe 16-bit little-endian mono PCM."""
         if sr is None or self.recognizer is None:
             raise RuntimeError("Speech recognition is not available")
         if sample_rate <= 0:
             raise ValueError("Sample rate must be a positive integer")
-        if not audio_data:
+        if not pcm_bytes:
             raise ValueError("Audio data is empty")
-        audio_array = np.array(audio_data, dtype=np.float32)
-        if not np.isfinite(audio_array).all():
-            raise ValueError("Audio data contains invalid values")
-        temp_file: Optional[str] = None
+        audio = sr.AudioData(pcm_bytes, sample_rate, 2)
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-                temp_file = tmp.name
-                pcm_audio = np.clip(audio_array, -1.0, 1.0)
-                pcm_bytes = (pcm_audio * 32767).astype(np.int16).tobytes()
-                with wave.open(tmp.name, 'wb') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(sample_rate)
-                    wav_file.writeframes(pcm_bytes)
-            with sr.AudioFile(temp_file) as source:
-                audio = self.recognizer.record(source)
             result = self.recognizer.recognize_google(audio, language='ja-JP', show_all=True)
-            transcript = ''
-            confidence: Optional[float] = None
-
-            if isinstance(result, dict):
-                alternatives = result.get('alternative') or []
-                if alternatives:
-                    primary = alternatives[0]
-                    transcript = primary.get('transcript', '')
-                    confidence = primary.get('confidence')
-            if not transcript:
-                transcript = self.recognizer.recognize_google(audio, language='ja-JP')
-            return TranscriptionResponse(text=transcript, confidence=confidence)
         except sr.UnknownValueError as exc:
             raise RuntimeError("Speech recognition could not understand the audio input") from exc
         except sr.RequestError as exc:
             raise RuntimeError(f"Speech recognition service request failed: {exc}") from exc
-        finally:
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except OSError:
-                    logger.debug("Temporary audio file cleanup failed", exc_info=True)
+
+        transcript = ''
+        confidence: Optional[float] = None
+        if isinstance(result, dict):
+            alternatives = result.get('alternative') or []
+            if alternatives:
+                primary = alternatives[0]
+                transcript = primary.get('transcript', '')
+                confidence = primary.get('confidence')
+        if not transcript:
+            raise RuntimeError("Speech recognition could not understand the audio input")
+        return TranscriptionResponse(text=transcript, confidence=confidence)
 
 
 
@@ -742,7 +837,7 @@ class VtuberAI:
         """Release background resources held by the VTuber instance."""
         self.is_listening = False
         self.is_running = False
-        if getattr(self, 'audio_stream', None) is not None:
+        if self.audio_stream is not None:
             try:
                 self.audio_stream.stop()
                 self.audio_stream.close()
@@ -754,6 +849,10 @@ class VtuberAI:
             self.recognition_thread.join(timeout=1)
         if self.animation_thread and self.animation_thread.is_alive():
             self.animation_thread.join(timeout=1)
+        try:
+            self._http_client.close()
+        except Exception:
+            logger.debug('HTTP client cleanup failed', exc_info=True)
 
     def _analyze_emotion(self, text: str) -> str:
         """Return the primary emotion label used by the UI."""
@@ -853,12 +952,14 @@ class VtuberAI:
         self.last_reward = None
         if emotion_data is None:
             emotion_data = self.emotion_analyzer.analyze_emotion(text)
+        if not emotion:
+            emotion = self._emotion_label_from_payload(emotion_data)
         if runtime_context is None:
             runtime_context = self._build_runtime_context(None)
         persisted_recent_history = runtime_context.get('recent_episode_context')
         if not isinstance(persisted_recent_history, list):
             persisted_recent_history = []
-        live_recent_history = getattr(self.bandit, 'conversation_history', [])[-3:]
+        live_recent_history = self.bandit.get_recent_history(3)
         recent_history = list(persisted_recent_history)[-2:] + list(live_recent_history)
         plan = self.conversation_planner.plan(
             user_text=text,
@@ -873,44 +974,19 @@ class VtuberAI:
         messages.extend(self._build_message_history(persistent_history=runtime_context.get('recent_episode_context')))
         user_message = self._prepare_user_prompt(text, plan, emotion_data, runtime_context)
         messages.append({'role': 'user', 'content': user_message})
+        response_text = ''
         if self.openai_client is None:
             logger.warning('VtuberAI: OpenAI client is unavailable; using fallback response.')
-            response_text = self._fallback_response(text, emotion, emotion_data, plan.topic_family)
-            self._finalise_generated_response(
-                user_text=text,
-                response_text=response_text,
-                user_emotion=emotion,
-                user_emotion_data=emotion_data,
-                runtime_context=runtime_context,
-                topic_family=plan.topic_family,
-            )
-            return response_text
-        try:
-            response_text = self._call_language_model(messages)
-        except Exception as exc:
-            logger.error('LLM response generation failed: %s', exc)
-            response_text = self._fallback_response(text, emotion, emotion_data, plan.topic_family)
-            self._finalise_generated_response(
-                user_text=text,
-                response_text=response_text,
-                user_emotion=emotion,
-                user_emotion_data=emotion_data,
-                runtime_context=runtime_context,
-                topic_family=plan.topic_family,
-            )
-            return response_text
+        else:
+            try:
+                response_text = self._call_language_model(messages)
+            except Exception as exc:
+                logger.error('LLM response generation failed: %s', exc)
+            else:
+                if not response_text:
+                    logger.warning('Received empty response from language model; using fallback.')
         if not response_text:
-            logger.warning('Received empty response from language model; using fallback.')
             response_text = self._fallback_response(text, emotion, emotion_data, plan.topic_family)
-            self._finalise_generated_response(
-                user_text=text,
-                response_text=response_text,
-                user_emotion=emotion,
-                user_emotion_data=emotion_data,
-                runtime_context=runtime_context,
-                topic_family=plan.topic_family,
-            )
-            return response_text
         self._finalise_generated_response(
             user_text=text,
             response_text=response_text,
@@ -921,4 +997,15 @@ class VtuberAI:
         )
         return response_text
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    host = os.getenv("RECOMATE_API_HOST", "127.0.0.1")
+    port = int(os.getenv("RECOMATE_API_PORT", "8000"))
+    if os.getenv("RECOMATE_ENV", "development").lower() in {"prod", "production"}:
+        # Conversation history lives in each worker's VtuberAI, so scale out explicitly.
+        uvicorn.run(
+            "api.main:app",
+            host=host,
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        )
+    else:
+        uvicorn.run("api.main:app", host=host, port=port, reload=True)
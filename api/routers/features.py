@@ -7,10 +7,8 @@ from dataclasses import asdict
 from typing import List, Optional
 from uuid import UUID
 
-import sqlalchemy as sa
 from fastapi import APIRouter, HTTPException, Query
 
-from ..db.models import MoodLog
 from ..dependencies import SessionDep
 from ..schemas import (
     AgentRequestAcknowledgeBody,
@@ -194,16 +192,8 @@ def agent_acknowledge_endpoint(payload: AgentRequestAcknowledgeBody, session: Se
 @router.post("/api/mood/transition", response_model=MoodStateResponse)
 def mood_transition_endpoint(payload: MoodTransitionRequest, session: SessionDep):
     try:
-        log_entry = transition_mood(session=session, user_id=payload.user_id, trigger=payload.trigger)
-        previous = (
-            session.execute(
-                sa.select(MoodLog)
-                .where(MoodLog.user_id == payload.user_id, MoodLog.ts < log_entry.ts)
-                .order_by(MoodLog.ts.desc())
-                .limit(1)
-            )
-            .scalars()
-            .first()
+        log_entry, previous_state = transition_mood(
+            session=session, user_id=payload.user_id, trigger=payload.trigger
         )
         history = [
             {
@@ -216,7 +206,7 @@ def mood_transition_endpoint(payload: MoodTransitionRequest, session: SessionDep
         return MoodStateResponse(
             user_id=payload.user_id,
             state=log_entry.state,
-            previous_state=previous.state if previous else None,
+            previous_state=previous_state,
             trigger=payload.trigger,
             weights=log_entry.weight_map_json or {},
             history=history,
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class TextInput(BaseModel):
@@ -16,10 +16,19 @@ class TextInput(BaseModel):
 
 
 class AudioInput(BaseModel):
-    audio_data: List[float]
+    # Base64 of little-endian int16 PCM; preferred over the per-sample list.
+    audio_b64: Optional[str] = None
+    # Deprecated: float samples in [-1.0, 1.0].
+    audio_data: Optional[List[float]] = None
     sample_rate: int = Field(..., gt=0)
     api_key: Optional[str] = None
 
+    @model_validator(mode="after")
+    def _require_audio(self) -> "AudioInput":
+        if self.audio_b64 is None and self.audio_data is None:
+            raise ValueError("Either audio_b64 or audio_data is required")
+        return self
+
 
 class TranscriptionResponse(BaseModel):
     text: str
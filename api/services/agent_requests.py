@@ -8,6 +8,7 @@ from typing import Dict, Optional
 from uuid import UUID
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ..db.models import AgentRequest, AgentState
@@ -34,10 +35,14 @@ DEFAULT_PAYLOADS: Dict[str, Dict[str, str]] = {
 def _ensure_state(session: Session, user_id: UUID) -> AgentState:
     state = session.get(AgentState, user_id)
     if state is None:
-        state = AgentState(user_id=user_id)
-        session.add(state)
-        session.commit()
-        session.refresh(state)
+        # Insert the default row in the caller's transaction; its commit persists it.
+        stmt = (
+            pg_insert(AgentState)
+            .values(user_id=user_id)
+            .on_conflict_do_nothing(index_elements=[AgentState.user_id])
+            .returning(AgentState)
+        )
+        state = session.scalars(stmt).one_or_none() or session.get(AgentState, user_id)
     return state
 
 
@@ -62,36 +67,29 @@ def generate_agent_request(
     """Generate a pending agent request if cooldown has elapsed."""
     state = _ensure_state(session, user_id)
     cooldown = cooldown or DEFAULT_COOLDOWN
+    now = datetime.now(timezone.utc)
 
-    last_request = (
-        session.execute(
+    # The latest request is only needed when it may be returned during cooldown.
+    if not force and state.last_request_ts and now - state.last_request_ts < cooldown:
+        last_request = session.execute(
             sa.select(AgentRequest)
             .where(AgentRequest.user_id == user_id)
             .order_by(AgentRequest.ts.desc())
-        )
-        .scalars()
-        .first()
-    )
-
-    if (
-        not force
-        and state.last_request_ts
-        and datetime.now(timezone.utc) - state.last_request_ts < cooldown
-    ):
-        logger.debug("Returning existing request due to cooldown for user %s", user_id)
+            .limit(1)
+        ).scalar_one_or_none()
         if last_request:
+            logger.debug("Returning existing request due to cooldown for user %s", user_id)
             return last_request
 
     kind = _select_request_kind(state)
     payload = dict(DEFAULT_PAYLOADS.get(kind, {}))
-    payload["generated_at"] = datetime.now(timezone.utc).isoformat()
+    payload["generated_at"] = now.isoformat()
 
     request = AgentRequest(user_id=user_id, kind=kind, payload=payload)
     session.add(request)
-    state.last_request_ts = datetime.now(timezone.utc)
+    state.last_request_ts = now
     session.add(state)
     session.commit()
-    session.refresh(request)
 
     logger.debug("Generated agent request %s for user %s", request.id, user_id)
     return request
@@ -118,7 +116,6 @@ def acknowledge_agent_request(
 
     session.add(request)
     session.commit()
-    session.refresh(request)
     logger.debug("Acknowledged agent request %s (accepted=%s)", request_id, accepted)
     return request
 
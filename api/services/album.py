@@ -3,55 +3,62 @@
 from __future__ import annotations
 
 import logging
-import re
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
 from ..db.models import AlbumWeekly, Episode
+from .keywords import extract_keywords
 
 logger = logging.getLogger(__name__)
 
-_WORD_RE = re.compile(r"[A-Za-z0-9ぁ-んァ-ヶ一-龯ー']+")
 
 
 def _extract_keywords(text: str, limit: int = 6) -> List[str]:
-    candidates = _WORD_RE.findall(text.lower())
-    seen: Dict[str, int] = {}
-    for word in candidates:
-        if len(word) < 2:
-            continue
-        seen[word] = seen.get(word, 0) + 1
-    ranked = sorted(seen.items(), key=lambda item: item[1], reverse=True)
-    return [word for word, _ in ranked[:limit]]
+    return extract_keywords(text, limit)
+
+
+@lru_cache(maxsize=1024)
+def _week_bounds(iso_year: int, iso_week: int) -> Tuple[datetime, datetime]:
+    reference = datetime.fromisocalendar(iso_year, iso_week, 1).replace(tzinfo=timezone.utc)
+    return reference, reference + timedelta(days=7)
+
+
+@lru_cache(maxsize=512)
+def _parse_week_id(week_id: str) -> Tuple[str, datetime, datetime]:
+    try:
+        year_part, week_part = week_id.split("-W")
+        reference, week_end = _week_bounds(int(year_part), int(week_part))
+    except Exception as exc:  # noqa: BLE001
+        raise ValueError("Invalid week_id format. Expected YYYY-Www.") from exc
+    return week_id, reference, week_end
 
 
 def _resolve_reference_datetime(week_id: Optional[str]) -> Tuple[str, datetime, datetime]:
     if week_id:
-        try:
-            year_part, week_part = week_id.split("-W")
-            reference = datetime.fromisocalendar(int(year_part), int(week_part), 1).replace(tzinfo=timezone.utc)
-            resolved_week_id = week_id
-        except Exception as exc:  # noqa: BLE001
-            raise ValueError("Invalid week_id format. Expected YYYY-Www.") from exc
-    else:
-        now = datetime.now(timezone.utc)
-        iso = now.isocalendar()
-        resolved_week_id = f"{iso.year}-W{iso.week:02d}"
-        reference = datetime.fromisocalendar(iso.year, iso.week, 1).replace(tzinfo=timezone.utc)
-    week_end = reference + timedelta(days=7)
-    return resolved_week_id, reference, week_end
+        return _parse_week_id(week_id)
+
+    iso = datetime.now(timezone.utc).isocalendar()
+    reference, week_end = _week_bounds(iso.year, iso.week)
+    return f"{iso.year}-W{iso.week:02d}", reference, week_end
 
 
 def _summarise_episodes(episodes: List[Episode]) -> Tuple[Dict[str, object], Dict[str, object], Dict[str, object], Optional[str]]:
-    if not episodes:
+    return _summarise_texts(ep.text for ep in episodes)
+
+
+def _summarise_texts(raw_texts: Iterable[str]) -> Tuple[Dict[str, object], Dict[str, object], Dict[str, object], Optional[str]]:
+    raw_texts = list(raw_texts)
+    if not raw_texts:
         empty = {"count": 0, "entries": []}
         return empty, empty, {}, None
 
-    texts = [ep.text.strip() for ep in episodes if ep.text.strip()]
+    texts = [stripped for stripped in (text.strip() for text in raw_texts) if stripped]
+
     top_entries = texts[:3]
 
     keywords = _extract_keywords(" ".join(texts))
@@ -82,8 +89,9 @@ def generate_weekly_album(
     if existing and not regenerate:
         return existing
 
+    # Only the text column is needed, so skip building Episode objects.
     stmt = (
-        sa.select(Episode)
+        sa.select(Episode.text)
         .where(
             Episode.user_id == user_id,
             Episode.ts >= week_start,
@@ -91,9 +99,7 @@ def generate_weekly_album(
         )
         .order_by(Episode.ts.asc())
     )
-    episodes = session.execute(stmt).scalars().all()
-
-    highlights, wins, photos, quote_best = _summarise_episodes(episodes)
+    highlights, wins, photos, quote_best = _summarise_texts(session.scalars(stmt))
 
     if existing:
         record = existing
@@ -107,7 +113,6 @@ def generate_weekly_album(
 
     session.add(record)
     session.commit()
-    session.refresh(record)
 
     logger.debug(
         "Generated weekly album for user %s week %s with %s entries",
@@ -3,32 +3,44 @@
 from __future__ import annotations
 
 from dataclasses import asdict
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 from uuid import UUID
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ..db.models import ConsentSetting
 
 
-def _ensure_setting(session: Session, user_id: UUID) -> ConsentSetting:
+def _ensure_setting(session: Session, user_id: UUID) -> Tuple[ConsentSetting, bool]:
+    """Return the user's row and whether this call inserted it (uncommitted)."""
     record = session.get(ConsentSetting, user_id)
-    if record is None:
-        record = ConsentSetting(user_id=user_id)
-        session.add(record)
-        session.commit()
-        session.refresh(record)
-    return record
+    if record is not None:
+        return record, False
+    stmt = (
+        pg_insert(ConsentSetting)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[ConsentSetting.user_id])
+        .returning(ConsentSetting)
+    )
+    record = session.scalars(stmt).one_or_none()
+    if record is not None:
+        return record, True
+    # A concurrent request inserted the row first.
+    return session.get(ConsentSetting, user_id), False
 
 
 def get_consent_setting(session: Session, user_id: UUID) -> ConsentSetting:
-    """Fetch existing consent settings, creating a default row if missing."""
-    return _ensure_setting(session, user_id)
+    """Fetch existing consent settings, inserting a default row if missing."""
+    record, created = _ensure_setting(session, user_id)
+    if created:
+        session.commit()
+    return record
 
 
 def update_consent_setting(session: Session, user_id: UUID, updates: Dict[str, Any]) -> ConsentSetting:
     """Apply partial updates to consent settings."""
-    record = _ensure_setting(session, user_id)
+    record, created = _ensure_setting(session, user_id)
 
     allowed_fields = {"night_mode", "push_intensity", "private_topics", "learning_paused"}
     changed = False
@@ -39,8 +51,8 @@ def update_consent_setting(session: Session, user_id: UUID, updates: Dict[str, A
 
     if changed:
         session.add(record)
+    if changed or created:
         session.commit()
-        session.refresh(record)
 
     return record
 
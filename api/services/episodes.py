@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-import re
 from typing import Dict, Iterable, List, Optional
 from uuid import UUID
 
@@ -11,8 +10,8 @@ import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
 from ..db.models import Episode
+from .keywords import extract_keywords
 
-_WORD_RE = re.compile(r"[A-Za-z0-9ぁ-んァ-ヶ一-龯ー']+")
 
 
 def compose_episode_text(user_text: str, assistant_text: str) -> str:
@@ -79,13 +78,7 @@ def _extract_topic_from_tags(tags: Iterable[str] | None) -> Optional[str]:
 
 
 def _extract_query_terms(query: str) -> List[str]:
-    seen: Dict[str, int] = {}
-    for term in _WORD_RE.findall((query or "").lower()):
-        if len(term) < 2:
-            continue
-        seen[term] = seen.get(term, 0) + 1
-    ranked = sorted(seen.items(), key=lambda item: item[1], reverse=True)
-    return [term for term, _ in ranked[:6]]
+    return extract_keywords(query or "", 6)
 
 
 def _episode_context_score(episode: Episode, query_terms: List[str], query_text: str, recency_index: int) -> float:
@@ -184,5 +177,4 @@ def record_episode(
     )
     session.add(episode)
     session.commit()
-    session.refresh(episode)
     return episode
@@ -0,0 +1,17 @@
+"""Shared keyword extraction for episode, memory, and album text."""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import AbstractSet, List
+
+WORD_RE = re.compile(r"[A-Za-z0-9ぁ-んァ-ヶ一-龯ー']+")
+
+
+def extract_keywords(text: str, limit: int, stopwords: AbstractSet[str] = frozenset()) -> List[str]:
+    """Return the most frequent words of two or more characters, first-seen order on ties."""
+    counts = Counter(
+        word for word in WORD_RE.findall(text.lower()) if len(word) >= 2 and word not in stopwords
+    )
+    return [word for word, _ in counts.most_common(limit)]
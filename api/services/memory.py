@@ -3,20 +3,20 @@
 from __future__ import annotations
 
 import logging
-import re
 from datetime import datetime, timezone
 from typing import Dict, Iterable, List, Optional
 from uuid import UUID
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
 
 from ..db.models import Episode, Memory
 from .episodes import parse_episode_text
+from .keywords import extract_keywords
 
 logger = logging.getLogger(__name__)
 
-_WORD_RE = re.compile(r"[A-Za-z0-9ぁ-んァ-ヶ一-龯ー']+")
 _MEMORY_STOPWORDS = {"user", "recomate", "assistant", "ユーザー", "相棒", "会話", "こと", "もの"}
 _AUTO_MEMORY_TOPICS = {"仕事・学び", "人間関係", "趣味・好きなもの", "体調・生活リズム", "悩み・気持ち整理", "将来・目標"}
 _AUTO_MEMORY_SIGNALS = (
@@ -73,16 +73,7 @@ def _generate_summary(text: str, max_length: int = 280) -> str:
 
 def _extract_keywords(text: str, limit: int = 8) -> List[str]:
     """Extract simple keyword candidates from text."""
-    candidates = _WORD_RE.findall(text.lower())
-    seen: Dict[str, int] = {}
-    for word in candidates:
-        if len(word) < 2:
-            continue
-        if word in _MEMORY_STOPWORDS:
-            continue
-        seen[word] = seen.get(word, 0) + 1
-    ranked = sorted(seen.items(), key=lambda item: item[1], reverse=True)
-    return [word for word, _ in ranked[:limit]]
+    return extract_keywords(text, limit, _MEMORY_STOPWORDS)
 
 
 def commit_memory(
@@ -110,7 +101,6 @@ def commit_memory(
     )
     session.add(memory)
     session.commit()
-    session.refresh(memory)
 
     logger.debug("Committed memory %s for episode %s", memory.id, episode_id)
     return memory
@@ -128,11 +118,12 @@ def search_memories(
         stmt = stmt.where(Memory.user_id == user_id)
 
     if query:
-        pattern = f"%{query.strip()}%"
+        term = query.strip()
+        # Both branches are index-backed: trigram GIN for ILIKE, array GIN for overlap.
         stmt = stmt.where(
             sa.or_(
-                Memory.summary_md.ilike(pattern),
-                sa.func.array_to_string(Memory.keywords, " ").ilike(pattern),
+                Memory.summary_md.ilike(f"%{term}%"),
+                Memory.keywords.overlap(sa.cast(sorted({term, term.lower()}), ARRAY(sa.Text))),
             )
         )
 
@@ -301,5 +292,4 @@ def promote_episode_to_memory_if_relevant(
     )
     session.add(memory)
     session.commit()
-    session.refresh(memory)
     return memory
@@ -9,6 +9,7 @@ from typing import Dict, Tuple
 from uuid import UUID
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ..db.models import AgentState, MoodLog
@@ -37,15 +38,24 @@ STATE_WEIGHTS: Dict[str, Dict[str, float]] = {
 }
 
 AVAILABLE_STATES = list(STATE_WEIGHTS.keys())
+# Fallback candidates per previous state, built once instead of per transition.
+_ALT_STATES: Dict[str, Tuple[str, ...]] = {
+    state: tuple(other for other in AVAILABLE_STATES if other != state) for state in AVAILABLE_STATES
+}
+_ALL_STATES: Tuple[str, ...] = tuple(AVAILABLE_STATES)
 
 
 def _ensure_agent_state(session: Session, user_id: UUID) -> AgentState:
     state = session.get(AgentState, user_id)
     if state is None:
-        state = AgentState(user_id=user_id)
-        session.add(state)
-        session.commit()
-        session.refresh(state)
+        # Insert the default row in the caller's transaction; its commit persists it.
+        stmt = (
+            pg_insert(AgentState)
+            .values(user_id=user_id)
+            .on_conflict_do_nothing(index_elements=[AgentState.user_id])
+            .returning(AgentState)
+        )
+        state = session.scalars(stmt).one_or_none() or session.get(AgentState, user_id)
     return state
 
 
@@ -54,22 +64,17 @@ def _pick_state(trigger: str | None, previous: str) -> str:
         mapped = TRIGGERS.get(trigger)
         if mapped:
             return mapped
-    fallback_candidates = [s for s in AVAILABLE_STATES if s != previous]
+    fallback_candidates = _ALT_STATES.get(previous, _ALL_STATES)
     return random.choice(fallback_candidates) if fallback_candidates else previous
 
 
-def transition_mood(session: Session, user_id: UUID, trigger: str | None = None) -> MoodLog:
+def transition_mood(
+    session: Session, user_id: UUID, trigger: str | None = None
+) -> Tuple[MoodLog, str | None]:
     state_row = _ensure_agent_state(session, user_id)
 
-    last_mood = (
-        session.execute(
-            sa.select(MoodLog).where(MoodLog.user_id == user_id).order_by(MoodLog.ts.desc())
-        )
-        .scalars()
-        .first()
-    )
-
-    previous_state = last_mood.state if last_mood else DEFAULT_STATE
+    last_state = state_row.last_mood_state
+    previous_state = last_state or DEFAULT_STATE
     new_state = _pick_state(trigger, previous_state)
 
     weights = STATE_WEIGHTS.get(new_state, {"calm": 0.5, "cheer": 0.5})
@@ -79,6 +84,7 @@ def transition_mood(session: Session, user_id: UUID, trigger: str | None = None)
     state_row.rest = max(0.0, min(1.0, state_row.rest + (0.1 if new_state == "穏やか" else -0.05)))
     state_row.orderliness = max(0.0, min(1.0, state_row.orderliness + random.uniform(-0.03, 0.05)))
     state_row.closeness = max(0.0, min(1.0, state_row.closeness + (0.08 if new_state in {"陽気", "心配"} else -0.02)))
+    state_row.last_mood_state = new_state
 
     log_entry = MoodLog(
         user_id=user_id,
@@ -91,7 +97,6 @@ def transition_mood(session: Session, user_id: UUID, trigger: str | None = None)
     session.add(log_entry)
     session.add(state_row)
     session.commit()
-    session.refresh(log_entry)
 
     logger.debug(
         "Mood transition for %s: %s -> %s via %s",
@@ -101,7 +106,7 @@ def transition_mood(session: Session, user_id: UUID, trigger: str | None = None)
         trigger,
     )
 
-    return log_entry
+    return log_entry, last_state
 
 
 def get_recent_moods(session: Session, user_id: UUID, limit: int = 10) -> Tuple[str, list[MoodLog]]:
@@ -28,7 +28,6 @@ def ensure_preference(session: Session, user_id: UUID) -> Preference:
         record = Preference(user_id=user_id)
         session.add(record)
         session.commit()
-        session.refresh(record)
     return record
 
 
@@ -149,5 +148,4 @@ def apply_preference_feedback(
     record.style_notes = updated["style_notes"]
     session.add(record)
     session.commit()
-    session.refresh(record)
     return record
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
@@ -14,6 +15,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from ..db.models import Ritual
 
 logger = logging.getLogger(__name__)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 RITUAL_EVENTS: Dict[str, Dict[str, List[Dict[str, str]]]] = {
     "morning": {
         "穏やか": [
@@ -78,10 +80,16 @@ class RitualPlan:
 def _extract_script_mapping(raw_yaml: Optional[str]) -> Dict[str, str]:
     if not raw_yaml:
         return {}
+    return dict(_parse_script_mapping(raw_yaml))
+
+
+@lru_cache(maxsize=256)
+def _parse_script_mapping(raw_yaml: str) -> Tuple[Tuple[str, str], ...]:
+    # Keyed by the YAML text itself, so edited rituals miss the cache naturally.
     try:
-        parsed = yaml.safe_load(raw_yaml)
+        parsed = yaml.load(raw_yaml, Loader=_YAML_LOADER)
     except yaml.YAMLError:
-        return {}
+        return ()
 
     def flatten(value: object) -> Dict[str, str]:
         if isinstance(value, dict):
@@ -96,7 +104,7 @@ def _extract_script_mapping(raw_yaml: Optional[str]) -> Dict[str, str]:
             return result
         return {}
 
-    return flatten(parsed)
+    return tuple(flatten(parsed).items())
 
 
 def _resolve_script(
@@ -23,7 +23,6 @@ def resolve_local_user(session: Session, user_id: UUID | None = None) -> User:
         created = User(id=user_id, display_name=DEFAULT_LOCAL_USER_NAME)
         session.add(created)
         session.commit()
-        session.refresh(created)
         return created
 
     existing_default = session.get(User, DEFAULT_LOCAL_USER_ID)
@@ -37,5 +36,4 @@ def resolve_local_user(session: Session, user_id: UUID | None = None) -> User:
     created = User(id=DEFAULT_LOCAL_USER_ID, display_name=DEFAULT_LOCAL_USER_NAME)
     session.add(created)
     session.commit()
-    session.refresh(created)
     return created
@@ -1,9 +1,12 @@
-import os
+import io
 import json
+import logging
 import requests
 import hashlib
-import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Iterator
 import time
 
 try:
@@ -11,13 +14,20 @@ try:
 except Exception:  # noqa: BLE001
     pygame = None  # type: ignore[assignment]
 
+logger = logging.getLogger(__name__)
+
 class TextToSpeech:
-    def __init__(self, voice_id=1, cache_dir="voice_cache"):
+    def __init__(self, voice_id=1, cache_dir="voice_cache", memory_cache_size=256):
         self.voice_id = voice_id
         self.base_url = "http://localhost:50021"
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
 
+        # 直近の音声をメモリに保持し、ディスク読み込みも省く（LRU）
+        self.memory_cache_size = max(int(memory_cache_size), 0)
+        self._memory_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_cache_lock = threading.Lock()
+
         # 音声の品質設定
         self.speed_scale = 1.0
         self.volume_scale = 1.0
@@ -51,88 +61,116 @@ class TextToSpeech:
                 response = self._request('GET', '/version', timeout=3)
                 if response.status_code == 200:
                     version = response.text
-                    print(f"VOICEVOX version: {version}")
+                    logger.info("VOICEVOX version: %s", version)
                     return
                 else:
-                    print(f"VOICEVOXサーバーが応答しません（試行 {i+1}/{max_retries}）")
+                    logger.warning("VOICEVOXサーバーが応答しません（試行 %d/%d）", i + 1, max_retries)
             except requests.exceptions.ConnectionError:
-                print(f"VOICEVOXサーバーに接続できません（試行 {i+1}/{max_retries}）")
+                logger.warning("VOICEVOXサーバーに接続できません（試行 %d/%d）", i + 1, max_retries)
             
             if i < max_retries - 1:
-                print(f"{retry_delay}秒後に再試行します...")
+                logger.info("%d秒後に再試行します...", retry_delay)
                 time.sleep(retry_delay)
         
-        print("警告: VOICEVOXサーバーに接続できません。音声合成機能は使用できません。")
+        logger.warning("VOICEVOXサーバーに接続できません。音声合成機能は使用できません。")
         # エラーを発生させずに続行
 
+    def _get_cache_key(self, text):
+        """テキストと音声設定からキャッシュキーを生成"""
+        cache_key = f"{text}_{self.voice_id}_{self.speed_scale}_{self.volume_scale}"
+        return hashlib.md5(cache_key.encode()).hexdigest()
+
     def _get_cache_path(self, text):
         """テキストに対応するキャッシュファイルのパスを取得"""
-        # テキストと設定からハッシュを生成
-        cache_key = f"{text}_{self.voice_id}_{self.speed_scale}_{self.volume_scale}"
-        hash_value = hashlib.md5(cache_key.encode()).hexdigest()
-        return self.cache_dir / f"{hash_value}.wav"
+        return self.cache_dir / f"{self._get_cache_key(text)}.wav"
+
+    def _memory_cache_get(self, key):
+        with self._memory_cache_lock:
+            audio_data = self._memory_cache.get(key)
+            if audio_data is not None:
+                self._memory_cache.move_to_end(key)
+            return audio_data
+
+    def _memory_cache_put(self, key, audio_data):
+        if self.memory_cache_size == 0:
+            return
+        with self._memory_cache_lock:
+            self._memory_cache[key] = audio_data
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+
+    def _synthesis_params(self, text):
+        """音声合成用のパラメータを設定"""
+        return {
+            "text": text,
+            "speaker": self.voice_id,
+            "speed_scale": self.speed_scale,
+            "volume_scale": self.volume_scale,
+            "pre_phoneme_length": self.pre_phoneme_length,
+            "post_phoneme_length": self.post_phoneme_length
+        }
+
+    def _request_synthesis(self, text, stream=False):
+        """audio_query → synthesis を実行し、synthesis のレスポンスを返す"""
+        params = self._synthesis_params(text)
+
+        # 音声合成のリクエスト
+        response = self._request('POST', '/audio_query', params=params)
+        if response.status_code != 200:
+            raise Exception(f"音声合成のリクエストに失敗: {response.status_code}")
+
+        # 音声を生成
+        response = self._request(
+            'POST',
+            '/synthesis',
+            params=params,
+            data=json.dumps(response.json()),
+            stream=stream,
+        )
+        if response.status_code != 200:
+            response.close()
+            raise Exception(f"音声の生成に失敗: {response.status_code}")
+        return response
 
     def _generate_audio(self, text):
         """音声を生成"""
         try:
-            # 音声合成用のパラメータを設定
-            params = {
-                "text": text,
-                "speaker": self.voice_id,
-                "speed_scale": self.speed_scale,
-                "volume_scale": self.volume_scale,
-                "pre_phoneme_length": self.pre_phoneme_length,
-                "post_phoneme_length": self.post_phoneme_length
-            }
-            
-            # 音声合成のリクエスト
-            response = self._request('POST', '/audio_query', params=params)
-            if response.status_code != 200:
-                raise Exception(f"音声合成のリクエストに失敗: {response.status_code}")
-            
-            # 音声を生成
-            response = self._request(
-                'POST',
-                '/synthesis',
-                params=params,
-                data=json.dumps(response.json()),
-            )
-            if response.status_code != 200:
-                raise Exception(f"音声の生成に失敗: {response.status_code}")
-            
-            return response.content
-            
+            return self._request_synthesis(text).content
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"VOICEVOXとの通信でエラーが発生: {str(e)}")
+
+    def _generate_audio_stream(self, text, chunk_size):
+        """VOICEVOX の synthesis 応答を受信したそばからチャンクで返す"""
+        try:
+            response = self._request_synthesis(text, stream=True)
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"VOICEVOXとの通信でエラーが発生: {str(e)}")
 
+        with response:
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        yield chunk
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"VOICEVOXとの通信でエラーが発生: {str(e)}")
+
     def speak(self, text):
         """テキストを音声に変換して再生"""
         try:
             self._ensure_playback_backend()
             audio_data = self.synthesise(text)
 
-            # 一時ファイルを作成
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_filename = temp_file.name
-                temp_file.write(audio_data)
-            
-            try:
-                # 音声を再生
-                pygame.mixer.music.load(temp_filename)
-                pygame.mixer.music.play()
-                
-                # 再生が終わるまで待機
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-            finally:
-                # 再生が終わったら一時ファイルを削除
-                try:
-                    os.unlink(temp_filename)
-                except Exception as e:
-                    print(f"一時ファイルの削除でエラーが発生: {str(e)}")
-            
+            # 一時ファイルを介さずメモリ上の WAV をそのまま再生
+            pygame.mixer.music.load(io.BytesIO(audio_data), "wav")
+            pygame.mixer.music.play()
+
+            # 再生が終わるまで待機
+            while pygame.mixer.music.get_busy():
+                pygame.time.Clock().tick(10)
+
         except Exception as e:
-            print(f"音声生成でエラーが発生: {str(e)}")
+            logger.error("音声生成でエラーが発生: %s", e)
             raise
 
     def set_voice_parameters(self, speed_scale=None, volume_scale=None, 
@@ -149,15 +187,49 @@ class TextToSpeech:
 
     def synthesise(self, text: str) -> bytes:
         """テキストを音声データに変換して返す"""
-        cache_path = self._get_cache_path(text)
+        cache_key = self._get_cache_key(text)
+        audio_data = self._memory_cache_get(cache_key)
+        if audio_data is not None:
+            logger.debug("tts_memory_cache_hit key=%s", cache_key)
+            return audio_data
+
+        cache_path = self.cache_dir / f"{cache_key}.wav"
         if cache_path.exists():
-            print("キャッシュから音声を読み込みます")
-            return cache_path.read_bytes()
+            logger.debug("tts_cache_hit path=%s", cache_path)
+            audio_data = cache_path.read_bytes()
+        else:
+            logger.debug("tts_cache_miss path=%s", cache_path)
+            audio_data = self._generate_audio(text)
+            cache_path.write_bytes(audio_data)
+        self._memory_cache_put(cache_key, audio_data)
+        return audio_data
 
-        print("新しい音声を生成します")
-        audio_data = self._generate_audio(text)
+    def synthesise_stream(self, text: str, chunk_size: int = 16384) -> Iterator[bytes]:
+        """テキストを音声データに変換し、chunk_size ごとに返す
+
+        キャッシュがなければ VOICEVOX の応答をそのまま中継し、受信完了後にキャッシュする。
+        """
+        cache_key = self._get_cache_key(text)
+        audio_data = self._memory_cache_get(cache_key)
+        cache_path = self.cache_dir / f"{cache_key}.wav"
+        if audio_data is None and cache_path.exists():
+            logger.debug("tts_cache_hit path=%s", cache_path)
+            audio_data = cache_path.read_bytes()
+            self._memory_cache_put(cache_key, audio_data)
+
+        if audio_data is not None:
+            for offset in range(0, len(audio_data), chunk_size):
+                yield audio_data[offset:offset + chunk_size]
+            return
+
+        logger.debug("tts_cache_miss path=%s", cache_path)
+        received = []
+        for chunk in self._generate_audio_stream(text, chunk_size):
+            received.append(chunk)
+            yield chunk
+        audio_data = b"".join(received)
         cache_path.write_bytes(audio_data)
-        return audio_data
+        self._memory_cache_put(cache_key, audio_data)
 
 if __name__ == "__main__":
     # テスト用
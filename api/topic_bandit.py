@@ -1,12 +1,20 @@
 import numpy as np
 import os
 import logging
-from typing import List, Dict, Tuple, Optional, Any
+from typing import List, Dict, Tuple, Optional, Any, Sequence, Union
+import orjson
 from openai import OpenAI
 import time
+from collections import OrderedDict, deque
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
+# LLM 呼び出しごとに作り直さないよう、固定の system メッセージは共有する
+_EXPLORE_SYSTEM_MESSAGE = {"role": "system", "content": "あなたは会話の文脈に基づいて最適なトピックを選択するアシスタントです。"}
+_EVALUATION_SYSTEM_MESSAGE = {"role": "system", "content": "あなたは会話の質を評価する専門家です。総合評価をJSONで返してください。"}
+_SUBTOPIC_SYSTEM_MESSAGE = {"role": "system", "content": "あなたは会話のトピックを生成する専門家です。"}
+
 
 class TopicBandit:
     """LinUCB-based multi-armed bandit for topic recommendation."""
@@ -20,19 +28,31 @@ class TopicBandit:
         recency_penalty: float = 0.4,
         frequency_penalty: float = 0.3,
         min_exploration_probability: float = 0.05,
+        history_size: int = 200,
     ):
         self.topics = topics
         self.n_topics = len(topics)
-        self.conversation_history: List[Dict] = []
+        self._topics_lower = [topic.lower() for topic in topics]
+        self._topics_joined = ', '.join(topics)
+        # 長時間のセッションでも履歴が増え続けないよう直近分だけ保持する
+        self.conversation_history: "deque[Dict[str, Any]]" = deque(maxlen=history_size)
 
         # LinUCB parameters
         self.emotion_labels = ['happy', 'sad', 'angry', 'surprised', 'neutral']
+        self._emotion_idx = {label: i for i, label in enumerate(self.emotion_labels)}
         self.max_subtopics = 5
         self.feature_dim = 4 + len(self.emotion_labels) + 2  # bias, keyword match, popularity, recency, emotions, subtopic stats
         self.exploration_param = max(alpha, 0.01)
-        self.A_matrices = [np.identity(self.feature_dim) for _ in range(self.n_topics)]
-        self.A_inv_matrices = [np.identity(self.feature_dim) for _ in range(self.n_topics)]
-        self.b_vectors = [np.zeros(self.feature_dim) for _ in range(self.n_topics)]
+        # トピックごとの行列・ベクトルを 1 つの配列に積み、スコア計算をまとめて行う
+        self.A_matrices = np.tile(np.identity(self.feature_dim), (self.n_topics, 1, 1))
+        self.A_inv_matrices = np.tile(np.identity(self.feature_dim), (self.n_topics, 1, 1))
+        self.b_vectors = np.zeros((self.n_topics, self.feature_dim))
+        # Sherman–Morrison 更新の回数（reinvert_interval ごとに逆行列を再計算）
+        self.reinvert_interval = 1000
+        self._sm_updates = np.zeros(self.n_topics, dtype=np.int64)
+        self._rng = np.random.default_rng()
+        # ランク 1 更新用の作業領域（update ごとの (d, d) 確保を避ける）
+        self._rank1_buffer = np.empty((self.feature_dim, self.feature_dim))
 
         # Legacy averages retained for stats/debugging
         self.values = np.zeros(self.n_topics)
@@ -51,6 +71,10 @@ class TopicBandit:
         self.recent_topic_buffer: List[int] = []
         self.recent_buffer_size = 5
 
+        # 同じ (入力, 応答) の評価は LLM を呼ばずに再利用する（LRU）
+        self.evaluation_cache_size = 256
+        self._evaluation_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
         self.client: Optional[OpenAI] = None
         self._client_initialisation_error: Optional[Exception] = None
 
@@ -80,24 +104,19 @@ class TopicBandit:
         else:
             features = dict(features)
             features.setdefault("context_text", context)
+        features = self._prepare_feature_payload(features)
 
-        best_idx = 0
-        best_score = float('-inf')
-        scores: List[Tuple[str, float]] = []
+        # 特徴量・ペナルティ・選択時刻で同じ時刻を使う
+        now = time.time()
+        X = self._build_feature_matrix(features, now=now)
+        expected, width = self._linucb_terms(X)
+        exploration_bonus = self.exploration_param * width
+        penalties = np.array([self._calculate_topic_penalty(idx, now) for idx in range(self.n_topics)])
+        score_values = expected + exploration_bonus - penalties
 
-        for idx in range(self.n_topics):
-            x = self._get_feature_vector(idx, features)
-            A_inv = self.A_inv_matrices[idx]
-            theta = A_inv @ self.b_vectors[idx]
-            exploration_bonus = self.exploration_param * np.sqrt(np.dot(x, A_inv @ x))
-            base_score = float(np.dot(theta, x) + exploration_bonus)
-            penalty = self._calculate_topic_penalty(idx)
-            score = base_score - penalty
-            scores.append((self.topics[idx], score))
-
-            if score > best_score:
-                best_score = score
-                best_idx = idx
+        best_idx = int(np.argmax(score_values))
+        best_score = float(score_values[best_idx])
+        scores: List[Tuple[str, float]] = list(zip(self.topics, score_values.tolist()))
 
         if self.total_selections > 0 and np.random.rand() < self.min_exploration_probability:
             unexplored = [i for i in range(self.n_topics) if self.topic_frequency[i] == 0]
@@ -112,30 +131,43 @@ class TopicBandit:
                 ", ".join(f"{name}:{score:.3f}" for name, score in top_candidates),
                 self.topics[best_idx],
                 best_score,
-                self._calculate_topic_penalty(best_idx),
+                self._calculate_topic_penalty(best_idx, now),
             )
 
         self._last_contexts[best_idx] = context
         self._last_features[best_idx] = features
-        current_time = time.time()
-        self.last_selected_times[best_idx] = current_time
+        self.last_selected_times[best_idx] = now
         self.total_selections += 1
         self.topic_frequency[best_idx] += 1
         self.counts[best_idx] += 1
         self._record_recent_topic(best_idx)
         return best_idx, self.topics[best_idx]
     
+    def _linucb_terms(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """各トピックの期待報酬 θᵀx と信頼幅 √(xᵀA⁻¹x) を返す"""
+        theta = np.einsum('kij,kj->ki', self.A_inv_matrices, self.b_vectors)
+        # 丸め誤差で二次形式がわずかに負になっても NaN にならないようにする
+        quad = np.einsum('ki,kij,kj->k', X, self.A_inv_matrices, X)
+        return np.einsum('ki,ki->k', theta, X), np.sqrt(np.maximum(quad, 0.0))
+
+    def _sample_topic_thompson(self, context: str) -> Tuple[int, str]:
+        """LinTS 近似: 信頼幅に比例したガウスノイズを加えたスコアでトピックを選ぶ"""
+        X = self._build_feature_matrix({"context_text": context})
+        expected, width = self._linucb_terms(X)
+        noise = self._rng.standard_normal(self.n_topics)
+        topic_idx = int(np.argmax(expected + self.exploration_param * width * noise))
+        return topic_idx, self.topics[topic_idx]
+
     def _explore_with_llm(self, context: str) -> Tuple[int, str]:
         """LLMを使用して関連トピックを探索"""
         if self.client is None:
-            logger.warning("TopicBandit: OpenAI client unavailable; selecting a random topic instead of LLM-guided exploration.")
-            topic_idx = np.random.randint(self.n_topics)
-            return topic_idx, self.topics[topic_idx]
+            logger.warning("TopicBandit: OpenAI client unavailable; falling back to Thompson sampling.")
+            return self._sample_topic_thompson(context)
 
         try:
             prompt = f"""
             以下の会話の文脈を考慮して、最も適切なトピックを選択してください。
-            利用可能なトピック: {', '.join(self.topics)}
+            利用可能なトピック: {self._topics_joined}
             
             会話の文脈: {context}
             
@@ -144,10 +176,7 @@ class TopicBandit:
             
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "あなたは会話の文脈に基づいて最適なトピックを選択するアシスタントです。"},
-                    {"role": "user", "content": prompt}
-                ]
+                messages=[_EXPLORE_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
             )
 
             selected_topic = (response.choices[0].message.content or '').strip()
@@ -155,88 +184,111 @@ class TopicBandit:
             return topic_idx, selected_topic
             
         except Exception as e:
-            print(f"LLMによるトピック選択でエラーが発生: {e}")
-            # エラー時はランダム選択にフォールバック
-            topic_idx = np.random.randint(self.n_topics)
-            return topic_idx, self.topics[topic_idx]
-
-    def _get_feature_vector(self, topic_idx: int, feature_payload: Dict[str, Any]) -> np.ndarray:
-        """LinUCB 用の特徴量ベクトルを生成"""
-        vector = np.zeros(self.feature_dim, dtype=float)
-        idx = 0
-
-        vector[idx] = 1.0  # bias
-        idx += 1
-
-        context_text = str(feature_payload.get('context_text', '') or '')
-        context_lower = context_text.lower()
-        user_text = str(feature_payload.get('user_input', '') or '').lower()
-        topic_keyword = self.topics[topic_idx].lower()
-        if topic_keyword and topic_keyword in user_text:
-            vector[idx] = 1.0
-        elif topic_keyword and topic_keyword in context_lower:
-            vector[idx] = 0.5
-        else:
-            vector[idx] = 0.0
-        idx += 1
-
-        total = max(float(self.total_selections), 1.0)
-        vector[idx] = float(self.topic_frequency[topic_idx]) / total
-        idx += 1
-
-        last_time = self.last_selected_times[topic_idx]
-        if last_time > 0:
-            delta = max(time.time() - last_time, 0.0)
-            vector[idx] = float(np.exp(-delta / 300.0))
-        else:
-            vector[idx] = 0.0
-        idx += 1
+            logger.warning("LLMによるトピック選択でエラーが発生: %s", e)
+            # エラー時は Thompson sampling にフォールバック
+            return self._sample_topic_thompson(context)
+
+    @staticmethod
+    def _prepare_feature_payload(feature_payload: Dict[str, Any]) -> Dict[str, Any]:
+        """トピックに依存しない前処理（小文字化・感情ラベル抽出）を 1 回だけ行う"""
+        if '_context_lower' in feature_payload:
+            return feature_payload
+
+        prepared = dict(feature_payload)
+        prepared['_context_lower'] = str(feature_payload.get('context_text', '') or '').lower()
+        prepared['_user_lower'] = str(feature_payload.get('user_input', '') or '').lower()
+        text_for_match = str(feature_payload.get('user_input') or feature_payload.get('context_text') or '')
+        prepared['_match_lower'] = text_for_match.lower()
 
         emotion_data = feature_payload.get('emotion') or {}
-        primary_emotions = emotion_data.get('primary_emotions')
         primary = ''
-        if isinstance(primary_emotions, list) and primary_emotions:
-            primary = str(primary_emotions[0]).lower()
+        if isinstance(emotion_data, dict):
+            primary_emotions = emotion_data.get('primary_emotions')
+            if isinstance(primary_emotions, list) and primary_emotions:
+                primary = str(primary_emotions[0]).lower()
         elif isinstance(emotion_data, str):
             primary = emotion_data.lower()
+        prepared['_primary_emotion'] = primary
+        return prepared
 
-        for label in self.emotion_labels:
-            vector[idx] = 1.0 if label == primary else 0.0
-            idx += 1
-
-        subtopics = feature_payload.get('subtopics')
-        if not subtopics:
-            topic = self.topics[topic_idx]
-            subtopics = self.subtopic_cache.get(topic, [])
+    def _get_feature_vector(self, topic_idx: int, feature_payload: Dict[str, Any]) -> np.ndarray:
+        """LinUCB 用の特徴量ベクトルを生成"""
+        return self._build_feature_matrix(feature_payload, [topic_idx])[0]
 
-        if subtopics:
-            vector[idx] = min(len(subtopics), self.max_subtopics) / float(self.max_subtopics)
+    def _build_feature_matrix(
+        self,
+        feature_payload: Dict[str, Any],
+        topic_indices: Optional[Sequence[int]] = None,
+        now: Optional[float] = None,
+    ) -> np.ndarray:
+        """指定トピック（省略時は全トピック）の特徴量行列 (K, feature_dim) を生成
+
+        トピックに依存しない列（bias・感情）は 1 度だけ計算して全行に書き込む。
+        ``now`` を省略した場合は現在時刻で recency を計算する。
+        """
+        feature_payload = self._prepare_feature_payload(feature_payload)
+        if topic_indices is None:
+            indices = np.arange(self.n_topics)
         else:
-            vector[idx] = 0.0
-        idx += 1
-
-        text_for_match = str(feature_payload.get('user_input') or feature_payload.get('context_text') or '')
-        text_lower = text_for_match.lower()
-        if subtopics:
+            indices = np.asarray(topic_indices, dtype=np.intp)
+        X = np.zeros((len(indices), self.feature_dim), dtype=float)
+
+        # bias
+        X[:, 0] = 1.0
+
+        # keyword match: ユーザー入力に含まれれば 1.0、文脈のみなら 0.5
+        context_lower = feature_payload['_context_lower']
+        user_text = feature_payload['_user_lower']
+        keywords = [self._topics_lower[idx] for idx in indices]
+        X[:, 1] = [
+            1.0 if keyword and keyword in user_text else 0.5 if keyword and keyword in context_lower else 0.0
+            for keyword in keywords
+        ]
+
+        # popularity
+        total = max(float(self.total_selections), 1.0)
+        X[:, 2] = self.topic_frequency[indices] / total
+
+        # recency
+        last_times = self.last_selected_times[indices]
+        if now is None:
+            now = time.time()
+        deltas = np.maximum(now - last_times, 0.0)
+        X[:, 3] = np.where(last_times > 0, np.exp(-deltas / 300.0), 0.0)
+
+        # emotions (one-hot)
+        emotion_start = 4
+        emotion_idx = self._emotion_idx.get(feature_payload['_primary_emotion'])
+        if emotion_idx is not None:
+            X[:, emotion_start + emotion_idx] = 1.0
+
+        # subtopic stats
+        subtopic_col = emotion_start + len(self.emotion_labels)
+        shared_subtopics = feature_payload.get('subtopics')
+        text_lower = feature_payload['_match_lower']
+        for row, idx in enumerate(indices):
+            subtopics = shared_subtopics or self.subtopic_cache.get(self.topics[idx], [])
+            if not subtopics:
+                continue
+            X[row, subtopic_col] = min(len(subtopics), self.max_subtopics) / float(self.max_subtopics)
             matches = sum(1 for item in subtopics if item and item.lower() in text_lower)
-            vector[idx] = matches / float(len(subtopics))
-        else:
-            vector[idx] = 0.0
-        idx += 1
+            X[row, subtopic_col + 1] = matches / float(len(subtopics))
 
-        return vector
+        return X
 
     def _record_recent_topic(self, topic_idx: int) -> None:
         self.recent_topic_buffer.append(topic_idx)
         if len(self.recent_topic_buffer) > self.recent_buffer_size:
             self.recent_topic_buffer.pop(0)
 
-    def _calculate_topic_penalty(self, topic_idx: int) -> float:
+    def _calculate_topic_penalty(self, topic_idx: int, now: Optional[float] = None) -> float:
         penalty = 0.0
 
         last_time = self.last_selected_times[topic_idx]
         if last_time > 0:
-            delta = max(time.time() - last_time, 0.0)
+            if now is None:
+                now = time.time()
+            delta = max(now - last_time, 0.0)
             if delta < self.recency_window:
                 penalty += self.recency_penalty * (1.0 - (delta / self.recency_window))
 
@@ -258,6 +310,12 @@ class TopicBandit:
             logger.warning("TopicBandit: OpenAI client unavailable; returning default evaluation score.")
             return 0.5
 
+        cache_key = (user_input, response)
+        cached = self._evaluation_cache.get(cache_key)
+        if cached is not None:
+            self._evaluation_cache.move_to_end(cache_key)
+            return cached
+
         try:
             prompt = f"""
             以下の会話の応答を評価してください：
@@ -271,47 +329,31 @@ class TopicBandit:
             3. 会話の継続性
             4. トピックとの関連性
             
-            各基準の評価と総合評価を以下の形式で返してください：
-            1. 0.8 (自然さと適切さ)
-            2. 0.7 (感情表現の豊かさ)
-            3. 0.9 (会話の継続性)
-            4. 0.8 (トピックとの関連性)
-            
-            総合評価: 0.8
+            各基準を踏まえた総合評価を以下のJSON形式で返してください: {{"overall": <float>}}
             """
             
             evaluation = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "あなたは会話の質を評価する専門家です。各基準の評価と総合評価を返してください。"},
-                    {"role": "user", "content": prompt}
-                ]
+                messages=[_EVALUATION_SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
             )
 
             score_text = (evaluation.choices[0].message.content or '').strip()
-            print("\n評価結果:")
-            print(score_text)
+            logger.debug("評価結果:\n%s", score_text)
             
             try:
-                # 総合評価を探す
-                import re
-                match = re.search(r'総合評価:\s*(\d+\.?\d*)', score_text)
-                if match:
-                    score = float(match.group(1))
-                else:
-                    # 総合評価が見つからない場合は最初の数値を探す
-                    match = re.search(r'\d+\.?\d*', score_text)
-                    if match:
-                        score = float(match.group())
-                    else:
-                        score = 0.5  # デフォルト値
-            except ValueError:
+                score = float(orjson.loads(score_text)["overall"])
+            except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
                 score = 0.5  # デフォルト値
             
-            return max(0.0, min(1.0, score))  # 0.0から1.0の範囲に制限
+            score = max(0.0, min(1.0, score))  # 0.0から1.0の範囲に制限
+            self._evaluation_cache[cache_key] = score
+            if len(self._evaluation_cache) > self.evaluation_cache_size:
+                self._evaluation_cache.popitem(last=False)
+            return score
             
         except Exception as e:
-            print(f"応答評価でエラーが発生: {e}")
+            logger.warning("応答評価でエラーが発生: %s", e)
             return 0.5  # エラー時は中立的な評価を返す
     
     def generate_subtopics(self, main_topic: str) -> List[str]:
@@ -333,10 +375,7 @@ class TopicBandit:
             
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "あなたは会話のトピックを生成する専門家です。"},
-                    {"role": "user", "content": prompt}
-                ]
+                messages=[_SUBTOPIC_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
             )
 
             subtopics = (response.choices[0].message.content or '').strip().split('\n')
@@ -345,31 +384,47 @@ class TopicBandit:
             return parsed
 
         except Exception as e:
-            print(f"サブトピック生成でエラーが発生: {e}")
+            logger.warning("サブトピック生成でエラーが発生: %s", e)
             return self.subtopic_cache.get(main_topic, [])
     
-    def update(self, topic_idx: int, reward: float, features: Optional[Dict[str, Any]] = None):
-        """LinUCB パラメータの更新"""
+    def update(
+        self,
+        topic_idx: int,
+        reward: float,
+        features: Optional[Union[Dict[str, Any], np.ndarray]] = None,
+    ):
+        """LinUCB パラメータの更新
+
+        ``features`` には特徴量 dict のほか、``feature_dim`` 長の特徴量ベクトルをそのまま渡せる。
+        """
         if topic_idx < 0 or topic_idx >= self.n_topics:
             logger.warning("TopicBandit.update: invalid topic index %s", topic_idx)
             return
 
-        if features is None:
-            features = self._last_features.get(topic_idx)
-            if features is None:
-                features = {"context_text": self._last_contexts.get(topic_idx, "")}
-        else:
-            features = dict(features)
-            features.setdefault("context_text", self._last_contexts.get(topic_idx, ""))
-
-        x = self._get_feature_vector(topic_idx, features)
+        x = self._resolve_update_features(topic_idx, features)
+        if x is None:
+            return
         A = self.A_matrices[topic_idx]
-        b = self.b_vectors[topic_idx]
+        A_inv = self.A_inv_matrices[topic_idx]
 
-        A += np.outer(x, x)
-        self.b_vectors[topic_idx] = b + reward * x
+        rank1 = self._rank1_buffer
+        A += np.outer(x, x, out=rank1)
+        self.b_vectors[topic_idx] += reward * x
         try:
-            self.A_inv_matrices[topic_idx] = np.linalg.inv(A)
+            # Sherman–Morrison: (A + xxᵀ)⁻¹ = A⁻¹ - (A⁻¹x)(A⁻¹x)ᵀ / (1 + xᵀA⁻¹x)
+            u = A_inv @ x
+            denom = 1.0 + float(x @ u)
+            self._sm_updates[topic_idx] += 1
+            if (
+                np.isfinite(denom)
+                and denom > 1e-12
+                and self._sm_updates[topic_idx] < self.reinvert_interval
+            ):
+                A_inv -= np.outer(u, u / denom, out=rank1)
+            else:
+                # 丸め誤差の蓄積を避けるため、定期的に A から逆行列を作り直す
+                self.A_inv_matrices[topic_idx] = np.linalg.inv(A)
+                self._sm_updates[topic_idx] = 0
         except np.linalg.LinAlgError:
             logger.exception("TopicBandit: failed to invert matrix for topic %s", self.topics[topic_idx])
             self.A_matrices[topic_idx] = np.identity(self.feature_dim)
@@ -379,6 +434,75 @@ class TopicBandit:
 
         self.values[topic_idx] += 0.1 * (reward - self.values[topic_idx])
     
+    def _resolve_update_features(
+        self,
+        topic_idx: int,
+        features: Optional[Union[Dict[str, Any], np.ndarray]],
+    ) -> Optional[np.ndarray]:
+        """update に渡された特徴量を ``feature_dim`` 長のベクトルに揃える（不正なら None）"""
+        if isinstance(features, np.ndarray):
+            x = features.astype(float, copy=False).reshape(-1)
+            if x.shape[0] != self.feature_dim:
+                logger.warning(
+                    "TopicBandit.update: expected %s features, got %s", self.feature_dim, x.shape[0]
+                )
+                return None
+            return x
+
+        if features is None:
+            features = self._last_features.get(topic_idx)
+            if features is None:
+                features = {"context_text": self._last_contexts.get(topic_idx, "")}
+        else:
+            features = dict(features)
+            features.setdefault("context_text", self._last_contexts.get(topic_idx, ""))
+        return self._get_feature_vector(topic_idx, features)
+
+    def update_batch(
+        self,
+        topic_indices: Sequence[int],
+        rewards: Sequence[float],
+        features_list: Optional[Sequence[Optional[Union[Dict[str, Any], np.ndarray]]]] = None,
+    ) -> None:
+        """複数の報酬をまとめて反映（ログからの再学習向け）
+
+        トピックごとに A += XᵀX, b += Xᵀr をまとめて加算し、逆行列は 1 回だけ作り直す。
+        """
+        if features_list is None:
+            features_list = [None] * len(topic_indices)
+        if not len(topic_indices) == len(rewards) == len(features_list):
+            raise ValueError("topic_indices, rewards and features_list must have the same length")
+
+        grouped: Dict[int, Tuple[List[np.ndarray], List[float]]] = {}
+        for topic_idx, reward, features in zip(topic_indices, rewards, features_list):
+            topic_idx = int(topic_idx)
+            if topic_idx < 0 or topic_idx >= self.n_topics:
+                logger.warning("TopicBandit.update_batch: invalid topic index %s", topic_idx)
+                continue
+            x = self._resolve_update_features(topic_idx, features)
+            if x is None:
+                continue
+            rows, topic_rewards = grouped.setdefault(topic_idx, ([], []))
+            rows.append(x)
+            topic_rewards.append(float(reward))
+
+        for topic_idx, (rows, topic_rewards) in grouped.items():
+            X = np.vstack(rows)
+            r = np.asarray(topic_rewards)
+            self.A_matrices[topic_idx] += X.T @ X
+            self.b_vectors[topic_idx] += X.T @ r
+            try:
+                self.A_inv_matrices[topic_idx] = np.linalg.inv(self.A_matrices[topic_idx])
+                self._sm_updates[topic_idx] = 0
+            except np.linalg.LinAlgError:
+                logger.exception("TopicBandit: failed to invert matrix for topic %s", self.topics[topic_idx])
+                self.A_matrices[topic_idx] = np.identity(self.feature_dim)
+                self.A_inv_matrices[topic_idx] = np.identity(self.feature_dim)
+                self.b_vectors[topic_idx] = np.zeros(self.feature_dim)
+                continue
+            for reward in topic_rewards:
+                self.values[topic_idx] += 0.1 * (reward - self.values[topic_idx])
+
     def get_topic_stats(self) -> Dict:
         """各トピックの統計情報を取得"""
         return {
@@ -399,6 +523,45 @@ class TopicBandit:
             'featureDim': self.feature_dim,
         }
     
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """LinUCB の学習状態を ``np.savez_compressed`` で保存"""
+        np.savez_compressed(
+            path,
+            topics=np.array(self.topics),
+            A=self.A_matrices,
+            A_inv=self.A_inv_matrices,
+            b=self.b_vectors,
+            sm_updates=self._sm_updates,
+            values=self.values,
+            counts=self.counts,
+            frequency=self.topic_frequency,
+            last=self.last_selected_times,
+            total=np.array(self.total_selections),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike], topics: List[str], **kwargs: Any) -> "TopicBandit":
+        """``save`` で保存した状態から TopicBandit を復元
+
+        ``kwargs`` はコンストラクタにそのまま渡す。トピック構成が異なる場合は ValueError。
+        """
+        bandit = cls(topics, **kwargs)
+        with np.load(path) as state:
+            if state['topics'].tolist() != list(topics):
+                raise ValueError("saved bandit state was built for a different topic list")
+            if state['A'].shape != bandit.A_matrices.shape:
+                raise ValueError("saved bandit state has an incompatible feature dimension")
+            bandit.A_matrices = state['A'].astype(float)
+            bandit.A_inv_matrices = state['A_inv'].astype(float)
+            bandit.b_vectors = state['b'].astype(float)
+            bandit._sm_updates = state['sm_updates'].astype(np.int64)
+            bandit.values = state['values'].astype(float)
+            bandit.counts = state['counts'].astype(float)
+            bandit.topic_frequency = state['frequency'].astype(float)
+            bandit.last_selected_times = state['last'].astype(float)
+            bandit.total_selections = int(state['total'])
+        return bandit
+
     def add_to_history(self, user_input: str, response: str, topic: str, reward: Optional[float] = None):
         """会話履歴に追加"""
         entry: Dict[str, Any] = {
@@ -411,6 +574,14 @@ class TopicBandit:
             entry['reward'] = reward
         self.conversation_history.append(entry)
 
+    def get_recent_history(self, limit: int) -> List[Dict[str, Any]]:
+        """直近 ``limit`` 件の会話履歴を古い順に返す"""
+        if limit <= 0:
+            return []
+        recent = list(islice(reversed(self.conversation_history), limit))
+        recent.reverse()
+        return recent
+
     def record_topic_selection(self, topic: str) -> Optional[int]:
         """Record a topic choice when selection is handled outside LinUCB."""
         if topic not in self.topics:
@@ -25,3 +25,12 @@ def test_analyze_emotion_detects_angry_assistant_phrase() -> None:
 
     assert emotion["primary_emotions"][0] == "angry"
     assert emotion["intensity"] > 0.5
+
+
+def test_analyze_emotion_collects_every_matching_keyword_in_order() -> None:
+    analyzer = EmotionAnalyzer()
+
+    emotion = analyzer.analyze_emotion("疲れたし不安だし、正直つらい")
+
+    assert emotion["primary_emotions"][0] == "sad"
+    assert emotion["reason"] == "検出キーワード: つらい, 疲れた, 不安"
@@ -1,3 +1,7 @@
+from types import SimpleNamespace
+
+import numpy as np
+
 from api.topic_bandit import TopicBandit
 
 
@@ -22,3 +26,118 @@ def test_record_selection_and_reward_update_share_the_same_topic_without_double_
     assert stats["count"] == 1
     assert stats["frequency"] == 1
     assert stats["value"] > 0.0
+
+
+def test_update_accepts_precomputed_feature_vector() -> None:
+    bandit = TopicBandit(["仕事・学び", "趣味・好きなもの"], client=None)
+    features = {
+        "user_input": "仕事でかなり疲れた",
+        "emotion": {"primary_emotions": ["sad"], "intensity": 0.7},
+    }
+    from_dict = TopicBandit(["仕事・学び", "趣味・好きなもの"], client=None)
+
+    bandit.update(0, 0.8, features=bandit._get_feature_vector(0, features))
+    from_dict.update(0, 0.8, features=features)
+
+    assert np.allclose(bandit.A_inv_matrices[0], from_dict.A_inv_matrices[0])
+    assert np.allclose(bandit.b_vectors[0], from_dict.b_vectors[0])
+
+
+def test_update_ignores_feature_vector_with_wrong_length() -> None:
+    bandit = TopicBandit(["仕事・学び"], client=None)
+
+    bandit.update(0, 0.8, features=np.ones(3))
+
+    assert np.allclose(bandit.b_vectors[0], 0.0)
+
+
+def test_update_keeps_inverse_in_sync_with_design_matrix() -> None:
+    bandit = TopicBandit(["仕事・学び", "趣味・好きなもの"], client=None)
+
+    for step, text in enumerate(["仕事でかなり疲れた", "趣味の話がしたい", "仕事・学びのこと"] * 4):
+        bandit.update(step % 2, 0.1 * step, features={"user_input": text})
+
+    for idx in range(bandit.n_topics):
+        assert np.allclose(bandit.A_inv_matrices[idx], np.linalg.inv(bandit.A_matrices[idx]))
+
+
+def test_update_periodically_reinverts_design_matrix() -> None:
+    bandit = TopicBandit(["仕事・学び"], client=None)
+    bandit.reinvert_interval = 3
+
+    for step in range(7):
+        bandit.update(0, 0.5, features={"user_input": f"仕事・学び {step}"})
+
+    assert bandit._sm_updates[0] == 1
+    assert np.allclose(bandit.A_inv_matrices[0], np.linalg.inv(bandit.A_matrices[0]))
+
+
+def test_evaluate_response_reuses_cached_score() -> None:
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content='{"overall": 0.8}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    bandit = TopicBandit(["仕事・学び"], client=client)
+
+    assert bandit.evaluate_response("疲れた", "おつかれさま") == 0.8
+    assert bandit.evaluate_response("疲れた", "おつかれさま") == 0.8
+    assert len(calls) == 1
+    assert calls[0]["response_format"] == {"type": "json_object"}
+
+
+def test_save_and_load_round_trip(tmp_path) -> None:
+    topics = ["仕事・学び", "趣味・好きなもの"]
+    bandit = TopicBandit(topics, client=None)
+    features = {"user_input": "仕事でかなり疲れた"}
+    bandit.record_topic_selection("仕事・学び")
+    bandit.update(0, 0.9, features=features)
+
+    path = tmp_path / "bandit.npz"
+    bandit.save(path)
+    restored = TopicBandit.load(path, topics, client=None)
+
+    assert np.allclose(restored.A_inv_matrices, bandit.A_inv_matrices)
+    assert np.allclose(restored.b_vectors, bandit.b_vectors)
+    assert restored.total_selections == 1
+    assert restored.get_topic_stats() == bandit.get_topic_stats()
+
+
+def test_update_batch_matches_sequential_updates() -> None:
+    topics = ["仕事・学び", "趣味・好きなもの"]
+    features = [
+        {"user_input": "仕事でかなり疲れた", "emotion": {"primary_emotions": ["sad"]}},
+        {"user_input": "新しいゲームを買った", "emotion": {"primary_emotions": ["happy"]}},
+        {"user_input": "仕事の勉強をしている"},
+    ]
+    topic_indices = [0, 1, 0]
+    rewards = [0.2, 0.9, 0.6]
+
+    sequential = TopicBandit(topics, client=None)
+    for topic_idx, reward, payload in zip(topic_indices, rewards, features):
+        sequential.update(topic_idx, reward, features=payload)
+    batched = TopicBandit(topics, client=None)
+    batched.update_batch(topic_indices, rewards, features)
+
+    assert np.allclose(batched.A_inv_matrices, sequential.A_inv_matrices)
+    assert np.allclose(batched.b_vectors, sequential.b_vectors)
+    assert np.allclose(batched.values, sequential.values)
+
+
+def test_explore_without_client_uses_thompson_sampling(monkeypatch) -> None:
+    topics = ["仕事・学び", "趣味・好きなもの", "食べ物"]
+    bandit = TopicBandit(topics, client=None)
+    bandit._rng = np.random.default_rng(0)
+
+    def fail_randint(*args, **kwargs):
+        raise AssertionError("uniform random fallback should not be used")
+
+    monkeypatch.setattr(np.random, "randint", fail_randint)
+
+    for _ in range(5):
+        topic_idx, topic = bandit._explore_with_llm("最近仕事が忙しい")
+        assert 0 <= topic_idx < len(topics)
+        assert topic == topics[topic_idx]
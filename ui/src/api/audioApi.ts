@@ -9,6 +9,21 @@ const buildHeaders = () => ({
   'Content-Type': 'application/json',
 });
 
+const encodePcm16Base64 = (audio: Float32Array): string => {
+  const pcm = new Int16Array(audio.length);
+  for (let i = 0; i < audio.length; i += 1) {
+    const sample = Math.max(-1, Math.min(1, audio[i]));
+    pcm[i] = Math.round(sample * 32767);
+  }
+  const bytes = new Uint8Array(pcm.buffer);
+  let binary = '';
+  const chunkSize = 0x8000;
+  for (let offset = 0; offset < bytes.length; offset += chunkSize) {
+    binary += String.fromCharCode(...bytes.subarray(offset, offset + chunkSize));
+  }
+  return btoa(binary);
+};
+
 export const requestTranscription = async (
   audio: Float32Array,
   sampleRate: number,
@@ -18,7 +33,7 @@ export const requestTranscription = async (
   const endpoint = baseUrl + '/api/transcribe';
 
   const payload: Record<string, unknown> = {
-    audio_data: Array.from(audio),
+    audio_b64: encodePcm16Base64(audio),
     sample_rate: sampleRate,
   };
 